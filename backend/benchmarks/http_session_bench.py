@@ -0,0 +1,130 @@
+"""
+Poll-cycle latency: a new ClientSession per request vs. one pooled session.
+
+Fetches `pages` pages with `concurrency` workers (like iter_updated_pages)
+from a local fake Notion API, or from --url (e.g. an HTTPS endpoint, where
+the TLS handshake saved by keep-alive matters most).
+
+Run from the backend directory:
+    python benchmarks/http_session_bench.py [--pages 200] [--concurrency 10]
+    python benchmarks/http_session_bench.py --url https://api.notion.com/v1/users/me \\
+        --header "Authorization: Bearer <token>" --header "Notion-Version: 2022-06-28"
+
+Results against the local fake API (plain HTTP, aiohttp 3.14, medians of 5 cycles):
+    200 pages, concurrency 10: new session per request 114-131 ms,
+        pooled 38-41 ms (first cycle 40-44 ms), 2.9-3.2x
+    500 pages, concurrency 10: 279 ms vs 92 ms (first cycle 94 ms), 3.0x
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+
+async def fake_page(request: web.Request) -> web.Response:
+    pageid = request.match_info["pageid"]
+    title = [{"type": "text", "plain_text": f"Page {pageid[:8]}"}]
+    return web.json_response(
+        {
+            "object": "page",
+            "id": pageid,
+            "url": "https://www.notion.so/" + pageid.replace("-", ""),
+            "properties": {"Name": {"type": "title", "title": title}},
+        }
+    )
+
+
+async def fetch_new_session(url: str, headers: dict) -> int:
+    """
+    make_request before the pooled session: connect, request, close.
+    """
+    async with ClientSession() as session:
+        async with session.get(url, headers=headers) as response:
+            await response.read()
+            return response.status
+
+
+def pooled_session() -> ClientSession:
+    connector = TCPConnector(
+        limit=100, limit_per_host=30, ttl_dns_cache=300, keepalive_timeout=30
+    )
+    return ClientSession(connector=connector, timeout=ClientTimeout(total=30))
+
+
+async def poll_cycle(urls: list[str], headers: dict, concurrency: int, fetch) -> float:
+    pending = iter(urls)
+
+    async def worker():
+        for url in pending:
+            await fetch(url, headers)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def run(args) -> dict:
+    headers = dict(header.split(": ", 1) for header in args.header)
+    runner = None
+    if args.url:
+        urls = [args.url] * args.pages
+    else:
+        app = web.Application()
+        app.router.add_get("/v1/pages/{pageid}", fake_page)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", args.port).start()
+        base = f"http://127.0.0.1:{args.port}/v1/pages/"
+        urls = [base + str(uuid.uuid4()) for _ in range(args.pages)]
+    try:
+        before = [
+            await poll_cycle(urls, headers, args.concurrency, fetch_new_session)
+            for _ in range(args.repeat)
+        ]
+        async with pooled_session() as session:
+
+            async def fetch_pooled(url: str, headers: dict) -> int:
+                async with session.get(url, headers=headers) as response:
+                    await response.read()
+                    return response.status
+
+            # 첫 사이클은 커넥션을 만드는 비용이 포함되므로 따로 기록
+            first = await poll_cycle(urls, headers, args.concurrency, fetch_pooled)
+            after = [
+                await poll_cycle(urls, headers, args.concurrency, fetch_pooled)
+                for _ in range(args.repeat)
+            ]
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    return {
+        "pages": args.pages,
+        "concurrency": args.concurrency,
+        "target": args.url or "local fake Notion",
+        "new_session_per_request_ms": {
+            "median": statistics.median(before) * 1000,
+            "min": min(before) * 1000,
+        },
+        "pooled_session_first_cycle_ms": first * 1000,
+        "pooled_session_ms": {
+            "median": statistics.median(after) * 1000,
+            "min": min(after) * 1000,
+        },
+        "speedup": statistics.median(before) / statistics.median(after),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=9192)
+    parser.add_argument("--url", help="fetch this URL instead of the fake API")
+    parser.add_argument("--header", action="append", default=[], help="'Name: value'")
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
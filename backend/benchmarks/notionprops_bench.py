@@ -0,0 +1,182 @@
+"""
+Micro-benchmark: compiled property extractors vs. the old per-property match block.
+
+Run from the backend directory:
+    python benchmarks/notionprops_bench.py [pages] [repeat]
+"""
+
+import sys
+import timeit
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from notionprops import PropertyExtractor  # noqa: E402
+
+
+def legacy_parse(pagedict: dict, pagedata: dict, tags: list[str]) -> dict:
+    """
+    The parser used by get_all_updated before the extractors were compiled.
+    """
+    prop = pagedata["properties"]
+    pagedict["pageurl"] = pagedata["url"]
+    pagedict["props"] = {}
+    for item in prop:
+        if prop[item]["type"] == "title":
+            if prop[item]["title"]:
+                pagedict["pagetitle"] = prop[item]["title"][0]["plain_text"]
+            else:
+                pagedict["status"] = False
+                continue
+        else:
+            match prop[item]["type"]:
+                case "rich_text":
+                    pagedict["props"][item] = (
+                        prop[item]["rich_text"][0]["plain_text"]
+                        if prop[item]["rich_text"]
+                        else ""
+                    )
+                case "select":
+                    pagedict["props"][item] = (
+                        prop[item]["select"]["name"] if prop[item]["select"] else ""
+                    )
+                    if item in tags:
+                        pagedict["tags"].append(pagedict["props"][item])
+                case "multi_select":
+                    pagedict["props"][item] = [
+                        tag["name"] for tag in prop[item]["multi_select"]
+                    ]
+                case "checkbox":
+                    pagedict["props"][item] = prop[item]["checkbox"]
+                case "number":
+                    pagedict["props"][item] = prop[item]["number"]
+                case "date":
+                    if prop[item]["date"] is not None:
+                        start = prop[item]["date"]["start"]
+                        end = prop[item]["date"]["end"]
+                        if start and end:
+                            pagedict["props"][item] = f"{start} ~ {end}"
+                        elif start:
+                            pagedict["props"][item] = start
+                        elif end:
+                            pagedict["props"][item] = end
+                case "people":
+                    pagedict["props"][item] = [
+                        user["name"] for user in prop[item]["people"]
+                    ]
+                case "files":
+                    pagedict["props"][item] = [
+                        file["name"] for file in prop[item]["files"]
+                    ]
+                case "url":
+                    pagedict["props"][item] = prop[item]["url"]
+                case "status":
+                    pagedict["props"][item] = (
+                        prop[item]["status"]["name"] if prop[item]["status"] else ""
+                    )
+                    if item in tags:
+                        pagedict["tags"].append(pagedict["props"][item])
+                case _:
+                    pagedict["props"][item] = prop[item]["type"] + " under dev"
+    return pagedict
+
+
+def text(value: str) -> list[dict]:
+    return [{"type": "text", "plain_text": value}]
+
+
+def make_page(i: int) -> dict:
+    properties = {
+        "Name": {"type": "title", "title": text(f"Task {i}")},
+        "Description": {"type": "rich_text", "rich_text": text("Some description")},
+        "Priority": {"type": "select", "select": {"name": "High"}},
+        "Status": {"type": "status", "status": {"name": "In progress"}},
+        "Labels": {
+            "type": "multi_select",
+            "multi_select": [{"name": "backend"}, {"name": "bug"}],
+        },
+        "Done": {"type": "checkbox", "checkbox": False},
+        "Estimate": {"type": "number", "number": 3},
+        "Due": {"type": "date", "date": {"start": "2025-05-01", "end": None}},
+        "Assignee": {"type": "people", "people": [{"id": "u1", "name": "Kim"}]},
+        "Attachments": {"type": "files", "files": [{"name": "spec.pdf"}]},
+        "Link": {"type": "url", "url": "https://example.com"},
+        "Score": {"type": "formula", "formula": {"type": "number", "number": 42}},
+        "Related": {"type": "relation", "relation": [{"id": "p1"}, {"id": "p2"}]},
+        "Edited": {"type": "last_edited_time", "last_edited_time": "2025-05-01"},
+        "ID": {"type": "unique_id", "unique_id": {"prefix": "TASK", "number": i}},
+    }
+    return {"url": f"https://www.notion.so/{i}", "properties": properties}
+
+
+def new_pagedict() -> dict:
+    return {"status": True, "tags": []}
+
+
+LEGACY_TYPES = {
+    "title",
+    "rich_text",
+    "select",
+    "status",
+    "multi_select",
+    "checkbox",
+    "number",
+    "date",
+    "people",
+    "files",
+    "url",
+}
+
+
+def bench(name: str, pages: list[dict], repeat: int) -> None:
+    tags = ["Priority", "Status"]
+    schema = pages[0]["properties"]
+    extractor = PropertyExtractor(schema, "v1")
+
+    def run_legacy():
+        for page in pages:
+            legacy_parse(new_pagedict(), page, tags)
+
+    def run_compiled():
+        # get_property_extractor + apply_properties (routers/notion.py)
+        for page in pages:
+            if extractor.matches(page["properties"]):
+                extractor.apply(dict(new_pagedict(), tags=[]), page, tags)
+
+    def run_compile():
+        PropertyExtractor(schema, "v1")
+
+    count = len(pages)
+    legacy = min(timeit.repeat(run_legacy, number=1, repeat=repeat))
+    compiled = min(timeit.repeat(run_compiled, number=1, repeat=repeat))
+    compile_cost = min(timeit.repeat(run_compile, number=100, repeat=repeat)) / 100
+    print(f"[{name}] pages: {count}, properties per page: {len(schema)}")
+    print(f"  legacy match block : {legacy * 1e6 / count:8.2f} us/page")
+    print(f"  compiled extractors: {compiled * 1e6 / count:8.2f} us/page")
+    print(f"  schema compile     : {compile_cost * 1e6:8.2f} us/database")
+    print(f"  speedup            : {legacy / compiled:8.2f}x")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pages = [make_page(i) for i in range(count)]
+    # 기존 코드가 지원하던 타입만 있는 경우 (같은 일을 하는 비교)
+    legacy_pages = [
+        {
+            "url": page["url"],
+            "properties": {
+                name: prop
+                for name, prop in page["properties"].items()
+                if prop["type"] in LEGACY_TYPES
+            },
+        }
+        for page in pages
+    ]
+    bench("legacy types", legacy_pages, repeat)
+    # formula, relation 등 새로 지원하는 타입 포함 (기존 코드는 "under dev" 문자열만 반환)
+    bench("all types", pages, repeat)
+
+
+if __name__ == "__main__":
+    main()
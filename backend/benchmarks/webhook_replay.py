@@ -0,0 +1,369 @@
+"""
+Webhook replay benchmark: POST /api/notion/webhook/{serverid} -> bot delivery.
+
+Starts a fake Notion API (users, pages, databases) and a stub of the bot's
+/call and /rpc endpoints, registers a benchmark server through the backend's
+internal API, replays webhook payloads at a fixed rate and writes a JSON
+report (events/s, p50/p99 latencies, upstream call counts).
+
+Run the backend against the stand-ins, e.g.
+    NOTION_API_URL=http://127.0.0.1:9191/v1 DISCORD_BOT_URL=http://127.0.0.1:9190 \\
+    MYSQL_HOST=127.0.0.1 python main.py
+then, from the backend directory:
+    python benchmarks/webhook_replay.py --rate 50 --events 2000
+
+End-to-end latency includes the webhook coalescing quiet period; set
+WEBHOOK_COALESCE_WINDOW=0 on the backend to measure the raw path.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+from os.path import abspath, dirname, join
+from typing import Optional
+
+from aiohttp import ClientSession, web
+
+INTERNAL = {"X-Internal-Request": "true"}
+EVENT_TYPES = [
+    "page.content_updated",
+    "page.properties_updated",
+    "page.created",
+    "page.moved",
+]
+
+
+def percentiles(values: list[float]) -> dict:
+    """
+    p50 / p99 / max in milliseconds (nearest rank).
+    """
+    if not values:
+        return {"p50": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def rank(p: float) -> float:
+        return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+    return {"p50": rank(0.5), "p99": rank(0.99), "max": values[-1] * 1000}
+
+
+class FakeNotion:
+    """
+    Notion API stand-in. Any page id exists, users come from a fixed list.
+    """
+
+    def __init__(self, users: int, latency: float):
+        self.latency = latency
+        self.users = [
+            {
+                "object": "user",
+                "id": str(uuid.UUID(int=i + 1)),
+                "type": "person",
+                "name": f"User {i}",
+                "avatar_url": None,
+            }
+            for i in range(users)
+        ]
+        self.userids = {user["id"]: user for user in self.users}
+        self.requests: dict[str, int] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/users", self.list_users)
+        app.router.add_get("/v1/users/{userid}", self.get_user)
+        app.router.add_get("/v1/pages/{pageid}", self.get_page)
+        app.router.add_get("/v1/databases/{databaseid}", self.get_database)
+        return app
+
+    async def _hit(self, name: str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def list_users(self, request: web.Request) -> web.Response:
+        await self._hit("users.list")
+        start = int(request.query.get("start_cursor", 0))
+        size = int(request.query.get("page_size", 100))
+        results = self.users[start:start + size]
+        more = start + size < len(self.users)
+        return web.json_response(
+            {
+                "object": "list",
+                "results": results,
+                "has_more": more,
+                "next_cursor": str(start + size) if more else None,
+            }
+        )
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        await self._hit("users.get")
+        user = self.userids.get(request.match_info["userid"])
+        if user is None:
+            return web.json_response({"object": "error", "status": 404}, status=404)
+        return web.json_response(user)
+
+    async def get_page(self, request: web.Request) -> web.Response:
+        await self._hit("pages.get")
+        pageid = request.match_info["pageid"]
+        name = f"Page {pageid[:8]}"
+        title = [{"type": "text", "text": {"content": name}, "plain_text": name}]
+        return web.json_response(
+            {
+                "object": "page",
+                "id": pageid,
+                "url": "https://www.notion.so/" + pageid.replace("-", ""),
+                "last_edited_time": datetime.now(timezone.utc).isoformat(),
+                "properties": {"Name": {"type": "title", "title": title}},
+            }
+        )
+
+    async def get_database(self, request: web.Request) -> web.Response:
+        await self._hit("databases.get")
+        databaseid = request.match_info["databaseid"]
+        return web.json_response(
+            {
+                "object": "database",
+                "id": databaseid,
+                "title": [{"plain_text": "Benchmark"}],
+                "last_edited_time": "2025-01-01T00:00:00.000Z",
+                "properties": {"Name": {"type": "title", "title": {}}},
+            }
+        )
+
+
+class StubBot:
+    """
+    Stand-in for the bot's /call and /rpc endpoints, records when events arrive.
+    """
+
+    def __init__(self):
+        self.requests: dict[str, int] = {}
+        self.received: list[tuple[float, dict]] = []
+        self.arrived = asyncio.Event()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        # DISCORD_APP_ROOT 가 붙어 있어도 마지막 두 경로만 봄
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        now = time.perf_counter()
+        parts = request.path.strip("/").split("/")
+        if len(parts) < 2 or parts[-2] not in ("call", "rpc"):
+            return web.json_response({"error": "Not found"}, status=404)
+        kind, function = parts[-2], parts[-1]
+        name = f"{kind}/{function}"
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if kind == "call":
+            params = json.loads(request.query.get("params", "{}"))
+        else:
+            params = await request.json()
+        if function in ("notionwebhook", "notionwebhooks"):
+            events = params if isinstance(params, list) else [params]
+            for event in events:
+                self.received.append((now, event))
+            self.arrived.set()
+        return web.json_response(None)
+
+
+def synthetic_events(count: int, pages: int, databaseid: str, users: list[dict]):
+    pageids = [str(uuid.uuid4()) for _ in range(pages)]
+    for _ in range(count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "workspace_id": "benchmark",
+            "workspace_name": "Benchmark",
+            "subscription_id": "benchmark",
+            "integration_id": "benchmark",
+            "type": random.choice(EVENT_TYPES),
+            "authors": [{"id": random.choice(users)["id"], "type": "person"}],
+            "attempt_number": 1,
+            "entity": {"id": random.choice(pageids), "type": "page"},
+            "data": {"parent": {"id": databaseid, "type": "database"}},
+        }
+
+
+def load_corpus(path: str, count: int) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    return [corpus[i % len(corpus)] for i in range(count)]
+
+
+async def setup_server(session: ClientSession, args, databaseid: str) -> None:
+    """
+    Register the benchmark server, its webhook channel, token and database.
+    """
+    api = args.backend + "/api"
+    server = f"{api}/discord/{args.server}"
+    calls = [
+        ("POST", server, None),
+        ("PUT", f"{server}/webhookchannel", args.channel),
+        ("PUT", f"{server}/notion/token", args.token),
+    ]
+    if args.link:
+        link = {
+            "serverid": args.server,
+            "databaseid": databaseid,
+            "databasename": "Benchmark",
+            "channelid": args.channel + 1,
+        }
+        calls.append(("POST", f"{api}/notion/database", link))
+    for method, url, body in calls:
+        async with session.request(method, url, json=body, headers=INTERNAL) as response:
+            await response.read()
+
+
+async def replay(session: ClientSession, args, events: list[dict], bot: StubBot):
+    url = f"{args.backend}/api/notion/webhook/{args.server}"
+    sent: dict[tuple[str, str], list[float]] = {}
+    ingest: list[float] = []
+    failed = 0
+
+    async def send(event: dict) -> None:
+        nonlocal failed
+        start = time.perf_counter()
+        sent.setdefault((event["entity"]["id"], event["type"]), []).append(start)
+        try:
+            async with session.post(url, json=event) as response:
+                await response.read()
+                if response.status != 200:
+                    failed += 1
+                    return
+        except Exception:
+            failed += 1
+            return
+        ingest.append(time.perf_counter() - start)
+
+    # 응답을 기다리지 않고 정해진 속도로 보냄 (open loop)
+    began = time.perf_counter()
+    tasks = []
+    for i, event in enumerate(events):
+        delay = began + i / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(event)))
+    await asyncio.gather(*tasks)
+    sendtime = time.perf_counter() - began
+
+    # 봇에 도착할 때까지 대기, drain 초 동안 새 이벤트가 없으면 종료
+    while True:
+        bot.arrived.clear()
+        try:
+            await asyncio.wait_for(bot.arrived.wait(), args.drain)
+        except asyncio.TimeoutError:
+            break
+
+    latencies = []
+    delivered = 0
+    last = began
+    for received, event in bot.received:
+        if "entity" not in event:
+            continue
+        delivered += event.get("count", 1)
+        # 합쳐진 이벤트는 먼저 보낸 것들까지 모두 이 시점에 전달된 것으로 봄
+        starts = sent.pop((event["entity"]["id"], event["type"]), [])
+        latencies.extend(received - start for start in starts if start <= received)
+        last = max(last, received)
+    return {
+        "sent": len(events),
+        "accepted": len(ingest),
+        "failed": failed,
+        "send_seconds": sendtime,
+        "ingest_rate": len(ingest) / sendtime if sendtime else None,
+        "ingest_latency_ms": percentiles(ingest),
+        "bot_messages": len([1 for _, event in bot.received if "entity" in event]),
+        "delivered_occurrences": delivered,
+        "resolved": len(latencies),
+        "unresolved": sum(len(starts) for starts in sent.values()),
+        "delivery_rate": len(latencies) / (last - began) if last > began else None,
+        "end_to_end_latency_ms": percentiles(latencies),
+    }
+
+
+def commit() -> Optional[str]:
+    try:
+        command = ["git", "rev-parse", "--short", "HEAD"]
+        cwd = dirname(abspath(__file__))
+        return subprocess.check_output(command, text=True, cwd=cwd).strip()
+    except Exception:
+        return None
+
+
+async def main(args):
+    random.seed(args.seed)
+    notion = FakeNotion(args.users, args.notion_latency / 1000)
+    bot = StubBot()
+    runners = []
+    for app, port in ((notion.app(), args.notion_port), (bot.app(), args.bot_port)):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, args.host, port).start()
+        runners.append(runner)
+    databaseid = str(uuid.UUID(int=args.server))
+    if args.corpus:
+        events = load_corpus(args.corpus, args.events)
+    else:
+        events = list(
+            synthetic_events(args.events, args.pages, databaseid, notion.users)
+        )
+    try:
+        async with ClientSession() as session:
+            await setup_server(session, args, databaseid)
+            result = await replay(session, args, events, bot)
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+    report = {
+        "commit": commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rate": args.rate,
+            "events": args.events,
+            "pages": args.pages,
+            "users": args.users,
+            "corpus": args.corpus,
+            "notion_latency_ms": args.notion_latency,
+            "linked_database": args.link,
+        },
+        "result": result,
+        "notion_requests": notion.requests,
+        "bot_requests": bot.requests,
+    }
+    output = args.output or join(
+        dirname(abspath(__file__)), f"webhook_replay-{report['commit'] or 'local'}.json"
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"report written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backend", default="http://127.0.0.1:9091")
+    parser.add_argument("--host", default="127.0.0.1", help="stand-ins bind address")
+    parser.add_argument("--notion-port", type=int, default=9191)
+    parser.add_argument("--bot-port", type=int, default=9190)
+    parser.add_argument("--rate", type=float, default=50, help="events per second")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=50, help="distinct pages")
+    parser.add_argument("--users", type=int, default=250, help="workspace users")
+    parser.add_argument("--corpus", help="JSON lines file of recorded webhook payloads")
+    parser.add_argument("--notion-latency", type=float, default=0, help="ms per call")
+    parser.add_argument("--server", type=int, default=1, help="Discord server id")
+    parser.add_argument("--channel", type=int, default=1000)
+    parser.add_argument("--token", default="benchmark-token")
+    parser.add_argument("--no-link", dest="link", action="store_false",
+                        help="don't link the database (skips page update marks)")
+    parser.add_argument("--drain", type=float, default=15,
+                        help="seconds without deliveries before the run ends")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="report path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,154 @@
+import random
+import time
+from urllib.parse import urlsplit
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open.
+    """
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is unavailable (retry in {retry_after:.1f}s)")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream (closed -> open -> half-open -> closed).
+    After `threshold` consecutive failures calls fail fast for `recovery`
+    seconds, then `probes` calls are let through to test the upstream.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name: str, threshold: int, recovery: float, probes: int):
+        """
+        :param threshold: consecutive failures that open the breaker
+        :param recovery: seconds the breaker stays open before half-open
+        :param probes: calls allowed at once while half-open
+        """
+        self.name = name
+        self.threshold = threshold
+        self.recovery = recovery
+        self.probes = probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = 0
+        self.calls = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def _update(self, now: float) -> None:
+        if self.state == self.OPEN and now - self.opened_at >= self.recovery:
+            self.state = self.HALF_OPEN
+            self.probing = 0
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery - time.monotonic())
+
+    def is_open(self) -> bool:
+        """
+        Whether calls would be rejected right now.
+        """
+        self._update(time.monotonic())
+        if self.state == self.HALF_OPEN:
+            return self.probing >= self.probes
+        return self.state == self.OPEN
+
+    def before_call(self) -> None:
+        """
+        Reserve a call, raises UpstreamUnavailable if it isn't allowed.
+        Every reserved call must be followed by success() or failure().
+        """
+        if self.is_open():
+            self.rejected += 1
+            raise UpstreamUnavailable(self.name, max(self.retry_after(), 1.0))
+        if self.state == self.HALF_OPEN:
+            self.probing += 1
+        self.calls += 1
+
+    def release(self) -> None:
+        """
+        Give back a reserved call that was cancelled before it finished.
+        """
+        if self.state == self.HALF_OPEN:
+            self.probing = max(0, self.probing - 1)
+
+    def success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self.probing = max(0, self.probing - 1)
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.total_failures += 1
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # 시험 호출이 실패하면 다시 차단
+            self._open()
+        elif self.state == self.CLOSED and self.failures >= self.threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probing = 0
+        self.opened += 1
+
+    def stats(self) -> dict:
+        self._update(time.monotonic())
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": self.retry_after(),
+            "calls": self.calls,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+class UpstreamBreakers:
+    """
+    One circuit breaker per upstream host (Notion, Discord, GitHub, bot).
+    """
+
+    def __init__(self, threshold: int, recovery: float, probes: int):
+        self.threshold = threshold
+        self.recovery = recovery
+        self.probes = probes
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        """
+        :param url: any URL of the upstream, the breaker is chosen by its host
+        """
+        host = urlsplit(url).netloc or url
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(
+                host, self.threshold, self.recovery, self.probes
+            )
+        return breaker
+
+    def is_open(self, url: str) -> bool:
+        return self.get(url).is_open()
+
+    def stats(self) -> dict:
+        return {host: breaker.stats() for host, breaker in self.breakers.items()}
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter.
+    :param attempt: number of the retry, starting at 0
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -1,55 +1,257 @@
-from typing import Any, Generic, TypeVar
+import asyncio
+import contextvars
+import sys
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
 
 from cachetools import TTLCache
 from db.models import NotionDatabase, NotionPages, ServerInfo
+from githubcache import GitHubHTTPCache
+from notionprops import PropertyExtractor
+from routing import WebhookRoutingTable
+from var import (CACHE_NAMESPACES, GITHUB_CACHE_DIR, GITHUB_CACHE_SIZE,
+                 WEBHOOK_ROUTES_REFRESH)
 
 K = TypeVar("K")
 V = TypeVar("V")
 
 
-class BaseTTLCacheService(Generic[K, V]):
-    def __init__(self, ttl_seconds: int = 3 * 60 * 60, maxsize: int = 100):
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+class InstrumentedTTLCache(TTLCache):
+    """
+    TTLCache that counts the entries it evicts (full) and expires (TTL).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        # cachetools는 자리가 부족할 때만 popitem을 호출 (만료된 항목은 먼저 정리됨)
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+class CacheNamespace(Generic[K, V]):
+    """
+    A named TTL cache with hit/miss/eviction/expiry counters.
+    Size and TTL come from CACHE_NAMESPACES (var.py).
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.cache = InstrumentedTTLCache(maxsize, ttl)
+        self.loading: dict[K, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.coalesced = 0
 
     def get(self, key: K) -> V | None:
-        return self.cache.get(key)
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
 
     def set(self, key: K, value: V) -> None:
         self.cache[key] = value
 
     def delete(self, key: K) -> None:
-        if key in self.cache:
-            del self.cache[key]
+        self.cache.pop(key, None)
 
     def getAll(self) -> TTLCache[Any, Any]:
         return self.cache
 
+    async def get_or_load(
+        self, key: K, loader: Callable[[], Awaitable[Optional[V]]]
+    ) -> Optional[V]:
+        """
+        Get a value, loading it on a miss. Concurrent misses of the same key
+        wait for one loader call. None results are returned but not cached.
+        The loader runs in its own task without the caller's context, so a
+        cancelled caller or its request deadline doesn't fail the others.
+        :param loader: async callable that loads the value of the key
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = self.loading.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(
+                self._load(key, loader), context=contextvars.Context()
+            )
+            # 기다리는 쪽이 모두 취소되어도 예외 경고가 나지 않도록
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.loading[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: K, loader: Callable[[], Awaitable[Optional[V]]]
+    ) -> Optional[V]:
+        try:
+            value = await loader()
+        except Exception:
+            self.load_errors += 1
+            raise
+        finally:
+            del self.loading[key]
+        self.loads += 1
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def stats(self, memory: bool = False) -> dict:
+        self.cache.expire()  # 만료된 항목을 세고 나서 크기를 보고
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "ttl": self.cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.cache.evictions,
+            "expirations": self.cache.expirations,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "coalesced": self.coalesced,
+        }
+        if memory:
+            stats["approx_bytes"] = sum(
+                approx_size(key) + approx_size(value)
+                for key, value in list(self.cache.items())
+            )
+        return stats
+
+
+def approx_size(value, depth: int = 4) -> int:
+    """
+    Rough memory use of a value: containers are followed a few levels down,
+    other objects (ORM rows, extractors) count their instance dict.
+    """
+    size = sys.getsizeof(value)
+    if depth == 0:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            approx_size(k, depth - 1) + approx_size(v, depth - 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, depth - 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += approx_size(vars(value), depth - 1)
+    return size
+
+
+class CacheRegistry:
+    """
+    All cache namespaces of the backend, for configuration and stats.
+    """
+
+    def __init__(self, config: dict[str, tuple[int, float]]):
+        """
+        :param config: namespace name -> (maxsize, ttl seconds)
+        """
+        self.config = config
+        self.namespaces: dict[str, CacheNamespace] = {}
+
+    def namespace(self, name: str, cls: type[CacheNamespace] = CacheNamespace):
+        if name in self.namespaces:
+            return self.namespaces[name]
+        maxsize, ttl = self.config[name]
+        namespace = self.namespaces[name] = cls(name, maxsize, ttl)
+        return namespace
+
+    def stats(self, memory: bool = False) -> dict:
+        return {
+            name: namespace.stats(memory)
+            for name, namespace in self.namespaces.items()
+        }
+
 
 # 각각의 캐시 서비스 정의
-class NotionUserCacheService(BaseTTLCacheService[str, dict]):
+class NotionPageCacheService(CacheNamespace[str, NotionPages]):
     pass
 
 
-class NotionPageCacheService(BaseTTLCacheService[str, NotionPages]):
+class DiscordServerCacheService(CacheNamespace[int, ServerInfo]):
     pass
 
 
-class DiscordServerCacheService(BaseTTLCacheService[int, ServerInfo]):
+class NotionDatabaseCacheService(CacheNamespace[str, NotionDatabase]):
     pass
 
 
-class NotionDatabaseCacheService(BaseTTLCacheService[str, NotionDatabase]):
+class NotionDatabaseMetaCacheService(CacheNamespace[str, dict]):
+    """
+    Notion database metadata (title, last_edited_time) fetched from the Notion API.
+    """
+
     pass
 
 
-_notion_user_cache = NotionUserCacheService(ttl_seconds=12 * 60 * 60)  # 12시간
-_notion_page_cache = NotionPageCacheService(12 * 60 * 60)  # 12시간
-_discord_server_cache = DiscordServerCacheService()
-_notion_database_cache = NotionDatabaseCacheService(ttl_seconds=12 * 60 * 60)
+class NotionPageTitleCacheService(CacheNamespace[str, str]):
+    """
+    Page titles, kept warm by the poll and used to enrich webhook events.
+    """
+
+    pass
 
 
-def get_notion_user_cache_service() -> NotionUserCacheService:
-    return _notion_user_cache
+class NotionSchemaCacheService(CacheNamespace[str, PropertyExtractor]):
+    """
+    Property extractors compiled from a Notion database schema.
+    """
+
+    pass
+
+
+class NotionPageObjectCacheService(CacheNamespace[str, dict]):
+    """
+    Page objects returned by the Notion API (GET /pages/{id}).
+    """
+
+    pass
+
+
+cache_registry = CacheRegistry(CACHE_NAMESPACES)
+
+_notion_page_cache = cache_registry.namespace("notion_page", NotionPageCacheService)
+_discord_server_cache = cache_registry.namespace(
+    "discord_server", DiscordServerCacheService
+)
+_notion_database_cache = cache_registry.namespace(
+    "notion_database", NotionDatabaseCacheService
+)
+# database.* 웹훅이 오면 무효화
+_notion_database_meta_cache = cache_registry.namespace(
+    "notion_database_meta", NotionDatabaseMetaCacheService
+)
+# 스키마 버전(last_edited_time)이 바뀌면 다시 컴파일
+_notion_schema_cache = cache_registry.namespace(
+    "notion_schema", NotionSchemaCacheService
+)
+# 폴링할 때마다 갱신
+_notion_page_title_cache = cache_registry.namespace(
+    "notion_page_title", NotionPageTitleCacheService
+)
+_notion_page_object_cache = cache_registry.namespace(
+    "notion_page_object", NotionPageObjectCacheService
+)
+
+_webhook_routing_table = WebhookRoutingTable(WEBHOOK_ROUTES_REFRESH)
+_github_http_cache = GitHubHTTPCache(GITHUB_CACHE_SIZE, GITHUB_CACHE_DIR)
 
 
 def get_notion_page_cache_service() -> NotionPageCacheService:
@@ -62,3 +264,27 @@ def get_discord_server_cache_service() -> DiscordServerCacheService:
 
 def get_notion_database_cache_service() -> NotionDatabaseCacheService:
     return _notion_database_cache
+
+
+def get_notion_database_meta_cache_service() -> NotionDatabaseMetaCacheService:
+    return _notion_database_meta_cache
+
+
+def get_notion_schema_cache_service() -> NotionSchemaCacheService:
+    return _notion_schema_cache
+
+
+def get_notion_page_title_cache_service() -> NotionPageTitleCacheService:
+    return _notion_page_title_cache
+
+
+def get_notion_page_object_cache_service() -> NotionPageObjectCacheService:
+    return _notion_page_object_cache
+
+
+def get_webhook_routing_table() -> WebhookRoutingTable:
+    return _webhook_routing_table
+
+
+def get_github_http_cache() -> GitHubHTTPCache:
+    return _github_http_cache
@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class CoalescedEntry:
+    def __init__(self, key: Hashable, deadline: float):
+        self.key = key
+        self.items: list[Any] = []
+        self.count = 0
+        self.first = time.monotonic()
+        self.deadline = deadline
+
+
+class KeyedCoalescer:
+    """
+    Collects submissions per key and flushes them in one batch once the key's
+    window has passed.
+    With debounce, every submission pushes the key's deadline back (quiet
+    period), capped at maxwait after the first submission.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        flush: Callable[[list[CoalescedEntry]], Awaitable[Any]],
+        debounce: bool = True,
+        maxwait: Optional[float] = None,
+    ):
+        """
+        :param window: seconds to wait for more submissions of the same key
+        :param flush: async callback that receives every due entry at once
+        :param debounce: reset the window on every submission
+        :param maxwait: upper bound of the delay since the first submission
+        """
+        self.window = window
+        self.flush = flush
+        self.debounce = debounce
+        self.maxwait = maxwait
+        self.pending: dict[Hashable, CoalescedEntry] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.flushed = 0
+
+    def submit(self, key: Hashable, item: Any = None) -> CoalescedEntry:
+        now = time.monotonic()
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = CoalescedEntry(key, now + self.window)
+            self.pending[key] = entry
+        elif self.debounce:
+            deadline = now + self.window
+            if self.maxwait is not None:
+                deadline = min(deadline, entry.first + self.maxwait)
+            entry.deadline = deadline
+        if item is not None:
+            entry.items.append(item)
+        entry.count += 1
+        self.submitted += 1
+        if self.task is None or self.task.done():
+            # 제출한 요청의 contextvar(마감 시각 등)를 물려받지 않음
+            self.task = asyncio.create_task(self._run(), context=contextvars.Context())
+        return entry
+
+    async def _run(self) -> None:
+        # 새 키의 마감 시각은 항상 기존 키들보다 늦으므로, 가장 이른 마감까지 자고 다시 확인하면 됨
+        while self.pending:
+            now = time.monotonic()
+            due = [key for key, entry in self.pending.items() if entry.deadline <= now]
+            if not due:
+                nextdeadline = min(entry.deadline for entry in self.pending.values())
+                await asyncio.sleep(nextdeadline - now)
+                continue
+            entries = [self.pending.pop(key) for key in due]
+            self.flushed += len(entries)
+            try:
+                await self.flush(entries)
+            except Exception as e:
+                logging.error(f"Failed to flush coalesced entries: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            # 같은 키로 합쳐진 제출 수
+            "coalesced": self.submitted - self.flushed - len(self.pending),
+        }
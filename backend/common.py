@@ -1,10 +1,19 @@
+import asyncio
 import json
+import time
+from contextvars import ContextVar
 from functools import wraps
+from typing import Optional
 
-from aiohttp import BasicAuth, ClientSession
+import orjson
+from aiohttp import (BasicAuth, ClientError, ClientSession, ClientTimeout,
+                     TCPConnector)
+from breaker import UpstreamBreakers, backoff_delay
 from fastapi.responses import JSONResponse
 from fastapi.templating import Jinja2Templates
 from llm_axe import Agent, OllamaChat
+from multidict import CIMultiDict
+from ratelimit import KeyedRateLimiter
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from var import *
 
@@ -98,18 +107,244 @@ async def make_request(
     :param internal: Flag to indicate if the request is internal
     :return: tuple of response status and response data
     """
+    response_status, response_data, _ = await make_raw_request(
+        method, url, params, data, json, headers, auth, internal
+    )
+    return response_status, response_data
+
+
+http_session: Optional[ClientSession] = None
+
+
+def get_http_session() -> ClientSession:
+    """
+    Process-wide pooled session for outbound HTTP (Notion, Discord, GitHub, bot).
+    Opened by the app lifespan, or lazily when used outside of it.
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        timeout = ClientTimeout(total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        http_session = ClientSession(connector=connector, timeout=timeout)
+    return http_session
+
+
+async def close_http_session() -> None:
+    global http_session
+    if http_session is not None:
+        await http_session.close()
+        http_session = None
+
+
+DEADLINE_HEADER = "X-Request-Deadline"
+# 처리 중인 요청의 마감 시각 (unix time), 봇이 인터랙션의 남은 시간으로 설정
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the deadline of the request being served has passed.
+    """
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Seconds left until the deadline of the request being served.
+    :return: None if the request has no deadline
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def can_retry(attempt: int, retries: int, delay: float) -> bool:
+    """
+    Whether another attempt can be made after waiting the delay.
+    """
+    budget = remaining_budget()
+    return attempt < retries and (budget is None or budget > delay)
+
+
+upstream_breakers = UpstreamBreakers(
+    UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RECOVERY_TIMEOUT, UPSTREAM_HALF_OPEN_PROBES
+)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+def parse_body(body: bytes) -> dict | str | None:
+    """
+    Decode a response body as JSON, or as text if it isn't JSON
+    (e.g. the HTML error page of a proxy in front of the upstream).
+    """
+    if not body.strip():
+        return None
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return body.decode(errors="replace")
+
+
+async def make_raw_request(
+    method: str,
+    url: str,
+    params: dict = None,
+    data: dict = None,
+    json: dict = None,
+    headers: dict = None,
+    auth: BasicAuth = None,
+    internal: bool = True,
+) -> (int, dict | str, CIMultiDict):
+    """
+    Same as make_request, but also returns the response headers.
+    Goes through the circuit breaker of the upstream host. Idempotent methods
+    are retried with jittered exponential backoff on connection errors,
+    timeouts and 502/503/504. Timeouts and retries are cut to the deadline of
+    the request being served, if it has one.
+    :raises UpstreamUnavailable: if the breaker of the upstream is open
+    :raises DeadlineExceeded: if the deadline passes before a response
+    :return: tuple of response status, response data and response headers
+             (case-insensitive, e.g. headers["retry-after"])
+    """
     headers = headers or {}
     if internal:
         headers["X-Internal-Request"] = (
             "true"  # this is a custom header to identify internal requests
         )
-    async with ClientSession() as session:
-        async with session.request(
-            method, url, headers=headers, params=params, data=data, auth=auth, json=json
-        ) as response:
-            response_status = response.status
-            response_data = await response.json()
-            return response_status, response_data
+    breaker = upstream_breakers.get(url)
+    retries = UPSTREAM_MAX_RETRIES if method.upper() in IDEMPOTENT_METHODS else 0
+    session = get_http_session()
+    for attempt in range(retries + 1):
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(f"No time left for {method} {url}")
+        timeout = session.timeout
+        clamped = budget is not None and budget < HTTP_TIMEOUT
+        if clamped:
+            # 요청의 남은 시간보다 오래 기다리지 않음
+            timeout = ClientTimeout(
+                total=budget, connect=min(budget, HTTP_CONNECT_TIMEOUT)
+            )
+        delay = backoff_delay(attempt, UPSTREAM_RETRY_BASE, UPSTREAM_RETRY_MAX)
+        breaker.before_call()
+        try:
+            async with session.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                data=data,
+                auth=auth,
+                json=json,
+                timeout=timeout,
+            ) as response:
+                response_status = response.status
+                response_data = parse_body(await response.read())
+                # 헤더 이름은 대소문자 구분 없이 조회 (GitHub 등은 소문자로 보냄)
+                response_headers = CIMultiDict(response.headers)
+        except asyncio.TimeoutError as e:
+            if clamped:
+                # 마감 때문에 줄인 타임아웃은 업스트림 장애로 세지 않음
+                breaker.release()
+                raise DeadlineExceeded(f"Deadline passed during {method} {url}") from e
+            breaker.failure()
+            if not can_retry(attempt, retries, delay):
+                raise
+        except ClientError:
+            breaker.failure()
+            if not can_retry(attempt, retries, delay):
+                raise
+        except BaseException:
+            # 취소나 예상하지 못한 예외 (본문 파싱, 잘못된 URL 등): 예약한 호출만 반납
+            breaker.release()
+            raise
+        else:
+            # 4xx는 요청의 문제이므로 업스트림 장애로 세지 않음
+            if response_status < 500:
+                breaker.success()
+                return response_status, response_data, response_headers
+            breaker.failure()
+            if response_status not in RETRY_STATUSES or not can_retry(
+                attempt, retries, delay
+            ):
+                return response_status, response_data, response_headers
+        await asyncio.sleep(delay)
+
+
+async def call_bot(function: str, params: dict | list) -> (int, dict | str):
+    """
+    Call a function registered on the Discord bot (POST /rpc/{function}).
+    :param function: name of the bot function
+    :param params: passed to the function, sent as an orjson encoded body
+    :return: tuple of response status and response data
+    """
+    url = discordbot + DISCORD_APP_ROOT + f"/rpc/{function}"
+    return await make_request(
+        "POST",
+        url,
+        data=orjson.dumps(params),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+notion_rate_limiter = KeyedRateLimiter(NOTION_RATE_LIMIT, NOTION_RATE_BURST)
+
+
+async def notion_request(
+    method: str,
+    endpoint: str,
+    token: str,
+    params: dict = None,
+    json: dict = None,
+) -> (int, dict | str):
+    """
+    Make a request to the Notion API, throttled per integration token.
+    429 responses block the token's bucket for Retry-After seconds and are retried.
+    Waiting for the bucket stops at the deadline of the request being served.
+    :param method: HTTP method (GET, POST, etc.)
+    :param endpoint: Notion API endpoint (e.g. /pages/{id})
+    :param token: Notion integration token
+    :param params: Query parameters
+    :param json: JSON data to send in the request body
+    :return: tuple of response status and response data
+    """
+    url = NOTION_API_URL + endpoint
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        budget = remaining_budget()
+        if budget is None:
+            await notion_rate_limiter.acquire(token)
+        else:
+            # 마감까지 토큰을 못 받으면 대기열에서 빠짐
+            try:
+                await asyncio.wait_for(
+                    notion_rate_limiter.acquire(token), max(budget, 0)
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"No time left for {method} {url}") from None
+        status, response, headers = await make_raw_request(
+            method,
+            url,
+            params=params,
+            json=json,
+            headers=notionHeaders(token),
+            internal=False,
+        )
+        if status != 429:
+            break
+        try:
+            retryafter = float(headers.get("Retry-After", 1))
+        except ValueError:
+            retryafter = 1.0
+        notion_rate_limiter.block(token, retryafter)
+    return status, response
 
 
 def checkInternalServer(func):
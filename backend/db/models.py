@@ -140,6 +140,8 @@ class NotionDatabase(Base):
     channel_id = Column(BigInteger, nullable=False)
     database_id = Column(VARCHAR(40), primary_key=True)
     database_name = Column(Text, nullable=True)
+    # 쿼리 동기화에서 마지막으로 본 last_edited_time (Notion ISO 8601 문자열)
+    sync_watermark = Column(VARCHAR(40), nullable=True)
 
     server = relationship("ServerInfo", back_populates="notion_databases")
     pages = relationship(
@@ -158,10 +160,33 @@ class NotionPages(Base):
     thread_id = Column(BigInteger, nullable=True)
     updated = Column(Boolean, nullable=False, default=False)
     blocked = Column(Boolean, nullable=False, default=False)
+    # 마지막으로 디스코드에 보낸 제목, 속성, 태그의 해시
+    content_hash = Column(VARCHAR(64), nullable=True)
+    # 업데이트로 표시될 때마다 증가, ack는 같은 버전일 때만 updated를 해제함
+    version = Column(Integer, nullable=False, default=0)
+    # 쿼리 동기화(NOTION_SYNC_MODE=query)에서 마지막으로 표시한 페이지의 last_edited_time
+    last_edited_time = Column(VARCHAR(40), nullable=True)
+    # 이 페이지를 처리 중인 워커와 임대 만료 시각 (여러 봇/백엔드 인스턴스 분산용)
+    lease_owner = Column(VARCHAR(64), nullable=True)
+    lease_expires = Column(DateTime, nullable=True)
 
     database = relationship("NotionDatabase", back_populates="pages")
 
 
+class NotionWebhookInbox(Base):
+    __tablename__ = "notion_webhook_inbox"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    server_id = Column(BigInteger, nullable=False)
+    body = Column(JSON, nullable=False)  # Notion이 보낸 웹훅 본문 그대로
+    attempts = Column(Integer, nullable=False, default=0)
+    # pending: 대기, processing: 워커가 처리 중, done: 완료, dead: 재시도 횟수 초과
+    status = Column(VARCHAR(16), nullable=False, default="pending", index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    # 재시도 대기 중인 이벤트는 이 시각 이후에 다시 처리됨
+    available_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
 class NotionTags(Base):
     __tablename__ = "notion_tags"
     idx = Column(Integer, primary_key=True, autoincrement=True)
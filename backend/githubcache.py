@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from typing import Optional
+
+import orjson
+from cachetools import LRUCache
+from common import make_raw_request
+from multidict import CIMultiDict
+
+
+class CachedResponse:
+    """
+    A GitHub response body with its validators (ETag / Last-Modified).
+    """
+
+    __slots__ = ("status", "data", "etag", "last_modified", "expires")
+
+    def __init__(
+        self,
+        status: int,
+        data,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        expires: float,
+    ):
+        self.status = status
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires  # unix time, 이후에는 조건부 요청으로 재검증
+
+    def todict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GitHubHTTPCache:
+    """
+    HTTP cache for GitHub REST GETs. Responses are kept with their ETag and
+    Last-Modified, served as is while fresh (Cache-Control max-age) and then
+    revalidated with If-None-Match / If-Modified-Since. GitHub doesn't count
+    a 304 against the rate limit.
+    """
+
+    def __init__(self, maxsize: int, directory: Optional[str] = None):
+        """
+        :param maxsize: responses kept in memory
+        :param directory: optional on-disk store, so validators survive restarts
+        """
+        self.entries: LRUCache[str, CachedResponse] = LRUCache(maxsize=maxsize)
+        self.directory = directory or None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0  # 요청 없이 응답
+        self.revalidated = 0  # 304
+        self.misses = 0  # 200 전체 응답
+
+    async def get(
+        self, url: str, params: dict = None, headers: dict = None
+    ) -> (int, dict | str):
+        """
+        GET a GitHub API URL through the cache.
+        :return: tuple of response status and response data
+        """
+        headers = CIMultiDict(headers or {})
+        key = self._key(url, params, headers)
+        entry = self.entries.get(key)
+        if entry is None and self.directory:
+            entry = await asyncio.to_thread(self._read, key)
+            if entry is not None:
+                self.entries[key] = entry
+        if entry is not None:
+            if entry.expires > time.time():
+                self.hits += 1
+                return entry.status, entry.data
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        status, data, responseheaders = await make_raw_request(
+            "GET", url, params=params, headers=headers, internal=False
+        )
+        if status == 304 and entry is not None:
+            self.revalidated += 1
+            entry.expires = time.time() + self._max_age(responseheaders)
+            await self._store(key, entry)
+            return entry.status, entry.data
+        self.misses += 1
+        # 응답 헤더는 대소문자 구분 없이 조회됨 (GitHub는 etag, last-modified 로 보냄)
+        etag = responseheaders.get("ETag")
+        lastmodified = responseheaders.get("Last-Modified")
+        if status == 200 and (etag or lastmodified):
+            entry = CachedResponse(
+                status,
+                data,
+                etag,
+                lastmodified,
+                time.time() + self._max_age(responseheaders),
+            )
+            self.entries[key] = entry
+            await self._store(key, entry)
+        return status, data
+
+    @staticmethod
+    def _key(url: str, params: Optional[dict], headers: CIMultiDict) -> str:
+        # 응답은 토큰마다 다를 수 있음 (Vary: Authorization)
+        authorization = headers.get("Authorization", "")
+        raw = orjson.dumps(
+            [url, sorted((params or {}).items()), authorization],
+            default=str,
+        )
+        return hashlib.sha256(raw).hexdigest()
+
+    @staticmethod
+    def _max_age(headers: CIMultiDict) -> int:
+        match = MAX_AGE.search(headers.get("Cache-Control", ""))
+        return int(match.group(1)) if match else 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return CachedResponse(**orjson.loads(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Failed to read github cache entry {key}: {e}")
+            return None
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        path = self._path(key)
+        # 쓰는 도중에 읽히지 않도록 임시 파일에 쓰고 교체
+        with open(path + ".tmp", "wb") as f:
+            f.write(orjson.dumps(entry.todict()))
+        os.replace(path + ".tmp", path)
+
+    async def _store(self, key: str, entry: CachedResponse) -> None:
+        if not self.directory:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, entry)
+        except Exception as e:
+            logging.warning(f"Failed to write github cache entry {key}: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.revalidated + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "revalidated_ratio": self.revalidated / total if total else 0.0,
+            "miss_ratio": self.misses / total if total else 0.0,
+        }
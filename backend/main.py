@@ -1,17 +1,24 @@
+import asyncio
 import logging
 import os
 import pkgutil
 import sys
+import time
+from contextlib import asynccontextmanager
 from functools import wraps
 from typing import Callable
 
 import uvicorn
-from common import templates
+from common import (DEADLINE_HEADER, DeadlineExceeded, async_session,
+                    close_http_session, get_http_session, request_deadline,
+                    templates)
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.responses import (HTMLResponse, JSONResponse, RedirectResponse,
                                Response)
 from fastapi.staticfiles import StaticFiles
+from services import notionservice
+from tasks.webhookworker import webhook_worker_pool
 
 # from tasks.notion_poller import poll_notion_projects
 os.makedirs("log", exist_ok=True)
@@ -26,8 +33,27 @@ logging.basicConfig(
 logger = logging.getLogger("NoityPy-Backend")
 logger.info("Starting NotiPy Backend...")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 서브앱(api)의 lifespan은 실행되지 않으므로 메인앱에서 백그라운드 작업을 관리
+    from routers.notion import notion_webhook_handler
+
+    get_http_session()  # 외부 HTTP 요청이 같이 쓰는 커넥션 풀
+    # 웹훅 라우팅 테이블을 한 번에 로드 (실패하면 첫 웹훅 때 다시 시도)
+    try:
+        async with async_session() as conn:
+            await notionservice.load_webhook_routes(conn)
+    except Exception as e:
+        logger.error(f"Failed to load webhook routes: {e}")
+    await webhook_worker_pool.start(notion_webhook_handler)
+    yield
+    await webhook_worker_pool.stop()
+    await close_http_session()
+
+
 # 1) fastapi 메인앱, api 용 서브앱 선언
-app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
 api = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
 
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
@@ -121,6 +147,38 @@ async def validation_exception_handler(
     )
 
 
+@api.middleware("http")
+async def request_deadline_middleware(request: Request, call_next):
+    """
+    Carry the caller's deadline (X-Request-Deadline, unix time) in a context
+    variable so upstream calls are cut to it, and reject requests that are
+    already past it (e.g. a Discord interaction that can't be answered anymore).
+    """
+    try:
+        deadline = float(request.headers[DEADLINE_HEADER])
+    except (KeyError, ValueError):
+        return await call_next(request)
+    if deadline <= time.time():
+        return deadline_exceeded_response(request)
+    token = request_deadline.set(deadline)
+    try:
+        return await call_next(request)
+    except DeadlineExceeded as e:
+        logging.warning(f"{request.url.path}: {e}")
+        return deadline_exceeded_response(request)
+    finally:
+        request_deadline.reset(token)
+
+
+def deadline_exceeded_response(request: Request) -> JSONResponse:
+    content = {
+        "status_code": 10504,
+        "message": f"Deadline exceeded: {request.url.path}",
+        "data": None,
+    }
+    return JSONResponse(content=content, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
+
+
 # 3) 메인 실행부: 자동으로 routers 폴더 내에 존재하는 모든 라우터 api에 장착
 if __name__ == "__main__":
     routers = []
@@ -132,4 +190,20 @@ if __name__ == "__main__":
         api.include_router(module.router)
     app.mount("/api", api)
     port = int(os.environ.get("BACKEND_PORT", 9091))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    unixsocket = os.environ.get("BACKEND_UNIX_SOCKET")
+    if not unixsocket:
+        uvicorn.run(app, host="0.0.0.0", port=port)
+    else:
+        # 같은 호스트의 봇을 위한 Unix 소켓 서버를 같은 앱으로 함께 띄움
+        # lifespan(워커 풀 등)은 TCP 서버에서 한 번만 실행
+        async def serve():
+            server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port))
+            socketserver = uvicorn.Server(
+                uvicorn.Config(app, uds=unixsocket, lifespan="off")
+            )
+            task = asyncio.create_task(socketserver.serve())
+            await server.serve()
+            socketserver.should_exit = True
+            await task
+
+        asyncio.run(serve())
@@ -0,0 +1,211 @@
+"""
+Notion 페이지 속성 파서.
+데이터베이스 스키마(/databases/{id} 의 properties)로부터 속성별 추출 함수 목록을
+미리 만들어 두고, 페이지마다 타입 문자열을 다시 분기하지 않고 그대로 적용합니다.
+"""
+
+import hashlib
+import json
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Optional
+
+TAG_TYPES = {"select", "status"}  # 디스코드 포럼 태그로 쓸 수 있는 타입
+
+
+def _plain_text(items: list) -> str:
+    if len(items) == 1:
+        return items[0]["plain_text"]
+    return "".join([item["plain_text"] for item in items])
+
+
+def _date(date: Optional[dict]) -> Optional[str]:
+    if date is None:
+        return None
+    start = date["start"]
+    end = date["end"]
+    if start and end:
+        return f"{start} ~ {end}"
+    return start or end
+
+
+def _user(user: dict) -> str:
+    # 권한이 없는 경우 이름 없이 id만 내려옴
+    return user.get("name") or user["id"]
+
+
+def _file(file: dict) -> str:
+    return file.get("name") or file.get(file.get("type"), {}).get("url", "")
+
+
+def _unique_id(value: dict) -> str:
+    if value["prefix"]:
+        return f"{value['prefix']}-{value['number']}"
+    return str(value["number"])
+
+
+def _formula(value: dict) -> Any:
+    kind = value["type"]
+    if kind == "date":
+        return _date(value["date"])
+    return value[kind]
+
+
+def _rollup(value: dict) -> Any:
+    kind = value["type"]
+    if kind == "array":
+        return [extract_value(item) for item in value["array"]]
+    if kind == "date":
+        return _date(value["date"])
+    return value.get(kind)
+
+
+def _text_of(kind: str) -> Callable[[dict], str]:
+    def extract(prop: dict) -> str:
+        return _plain_text(prop[kind])
+
+    return extract
+
+
+def _name_of(kind: str) -> Callable[[dict], str]:
+    def extract(prop: dict) -> str:
+        value = prop[kind]
+        return value["name"] if value else ""
+
+    return extract
+
+
+def _names_of(kind: str) -> Callable[[dict], list[str]]:
+    def extract(prop: dict) -> list[str]:
+        return [item["name"] for item in prop[kind]]
+
+    return extract
+
+
+def _date_of(prop: dict) -> Optional[str]:
+    return _date(prop["date"])
+
+
+def _unsupported(kind: str, value: dict) -> str:
+    return kind + " under dev"
+
+
+EXTRACTORS: dict[str, Callable[[dict], Any]] = {
+    "title": _text_of("title"),
+    "rich_text": _text_of("rich_text"),
+    "select": _name_of("select"),
+    "status": _name_of("status"),
+    "multi_select": _names_of("multi_select"),
+    "checkbox": itemgetter("checkbox"),
+    "number": itemgetter("number"),
+    "url": itemgetter("url"),
+    "email": itemgetter("email"),
+    "phone_number": itemgetter("phone_number"),
+    "date": _date_of,
+    "people": lambda p: [_user(user) for user in p["people"]],
+    "files": lambda p: [_file(file) for file in p["files"]],
+    "formula": lambda p: _formula(p["formula"]),
+    "relation": lambda p: [relation["id"] for relation in p["relation"]],
+    "rollup": lambda p: _rollup(p["rollup"]),
+    "created_by": lambda p: _user(p["created_by"]),
+    "last_edited_by": lambda p: _user(p["last_edited_by"]),
+    "created_time": itemgetter("created_time"),
+    "last_edited_time": itemgetter("last_edited_time"),
+    "unique_id": lambda p: _unique_id(p["unique_id"]),
+    "verification": lambda p: (
+        p["verification"]["state"] if p["verification"] else ""
+    ),
+}
+
+
+def extract_value(prop: dict) -> Any:
+    """
+    Extract the value of a single property (dispatches on its type).
+    Used for values without a schema, such as rollup array items.
+    """
+    kind = prop["type"]
+    return EXTRACTORS.get(kind, partial(_unsupported, kind))(prop)
+
+
+class PropertyExtractor:
+    """
+    Extractors compiled from a database schema.
+    """
+
+    def __init__(self, properties: dict, version: Optional[str] = None):
+        """
+        :param properties: "properties" of a database (or of a page, both carry the type)
+        :param version: schema version, the database last_edited_time
+        """
+        self.version = version
+        self.title = None
+        self.extractors: list[tuple[str, Callable[[dict], Any], bool]] = []
+        for name, schema in properties.items():
+            kind = schema["type"]
+            if kind == "title":
+                self.title = name
+                continue
+            if kind == "button":
+                continue  # 버튼은 값이 없음
+            func = EXTRACTORS.get(kind, partial(_unsupported, kind))
+            self.extractors.append((name, func, kind in TAG_TYPES))
+        self.count = len(properties)
+
+    def matches(self, properties: dict) -> bool:
+        """
+        Cheap check that the page has as many properties as the schema.
+        A property that keeps its name but changes type makes apply() raise
+        KeyError or TypeError instead, so pages aren't compared type by type.
+        """
+        return len(properties) == self.count
+
+    def apply(self, pagedict: dict, pagedata: dict, tags: list[str]) -> dict:
+        """
+        Parse the title, url and properties of a Notion page into pagedict.
+        """
+        prop = pagedata["properties"]
+        pagedict["pageurl"] = pagedata["url"]
+        props = pagedict["props"] = {}
+        title = prop.get(self.title)
+        if title and title["title"]:
+            pagedict["pagetitle"] = _plain_text(title["title"])
+        else:
+            pagedict["status"] = False
+        for name, func, taggable in self.extractors:
+            value = prop.get(name)
+            if value is None:
+                continue
+            value = props[name] = func(value)
+            if taggable and name in tags:
+                pagedict["tags"].append(value)  # tag for discord forum channel
+        return pagedict
+
+
+def page_title(properties: dict) -> Optional[str]:
+    """
+    Title of a page from its properties, None if the title is empty.
+    """
+    for prop in properties.values():
+        if prop.get("type") == "title":
+            return _plain_text(prop["title"]) if prop["title"] else None
+    return None
+
+
+def page_url(pageid: str) -> str:
+    """
+    URL of a page built from its id, Notion redirects it to the canonical URL.
+    """
+    return "https://www.notion.so/" + pageid.replace("-", "")
+
+
+def content_hash(pagedict: dict) -> str:
+    """
+    Stable hash of what the bot renders for a page (title, properties, tags).
+    """
+    content = {
+        "title": pagedict.get("pagetitle"),
+        "props": pagedict.get("props"),
+        "tags": pagedict.get("tags"),
+    }
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
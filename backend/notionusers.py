@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from cachetools import LRUCache
+from common import notion_request
+
+
+class WorkspaceUsers:
+    """
+    Users of one Notion workspace (one integration token).
+    """
+
+    def __init__(self):
+        self.users: dict[str, dict] = {}
+        self.missing: dict[str, float] = {}  # 없는 사용자 id -> 음성 캐시 만료 시각
+        self.loaded = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+
+class NotionUserDirectory:
+    """
+    Per-token directory of Notion users, loaded from the paginated /users list
+    and refreshed in the background, so looking up a webhook author is a
+    dictionary lookup. Users the list doesn't know (e.g. guests) are fetched
+    one by one, and unknown or deleted users are cached as negative entries.
+    """
+
+    def __init__(self, refresh: float, negative_ttl: float, workspaces: int):
+        """
+        :param refresh: seconds after which a workspace's user list is reloaded
+        :param negative_ttl: seconds an unknown user id is remembered
+        :param workspaces: number of workspaces (tokens) kept in memory
+        """
+        self.refresh = refresh
+        self.negative_ttl = negative_ttl
+        self.workspaces: LRUCache[str, WorkspaceUsers] = LRUCache(maxsize=workspaces)
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    async def get(self, userid: str, token: str) -> Optional[dict]:
+        """
+        Get a Notion user object.
+        :return: None if the user doesn't exist or can't be seen with the token
+        """
+        workspace = self.workspaces.get(token)
+        if workspace is None:
+            workspace = self.workspaces[token] = WorkspaceUsers()
+        if not workspace.loaded:
+            # 처음 한 번은 목록을 받을 때까지 기다림
+            await asyncio.shield(self._schedule(token, workspace))
+        elif time.monotonic() - workspace.loaded > self.refresh:
+            self._schedule(token, workspace)
+        user = workspace.users.get(userid)
+        if user is not None:
+            self.hits += 1
+            return user
+        expires = workspace.missing.get(userid)
+        if expires is not None and expires > time.monotonic():
+            self.negative_hits += 1
+            return None
+        self.misses += 1
+        return await self._fetch_user(userid, token, workspace)
+
+    def _schedule(self, token: str, workspace: WorkspaceUsers) -> asyncio.Task:
+        if workspace.task is None or workspace.task.done():
+            # 백그라운드 로드는 요청의 마감 시각을 물려받지 않음
+            workspace.task = asyncio.create_task(
+                self._load(token, workspace), context=contextvars.Context()
+            )
+        return workspace.task
+
+    async def _load(self, token: str, workspace: WorkspaceUsers) -> None:
+        try:
+            users = await self._list_users(token)
+        except Exception as e:
+            logging.warning(f"Failed to list notion users: {e}")
+            users = None
+        now = time.monotonic()
+        # 실패해도 loaded를 갱신해서 매 요청마다 다시 받지 않도록 함
+        workspace.loaded = now
+        if users is None:
+            return
+        workspace.users = users
+        workspace.missing = {
+            userid: expires
+            for userid, expires in workspace.missing.items()
+            if userid not in users and expires > now
+        }
+
+    async def _list_users(self, token: str) -> Optional[dict[str, dict]]:
+        users = {}
+        params = {"page_size": 100}
+        while True:
+            statuscode, response = await notion_request(
+                "GET", "/users", token, params=params
+            )
+            if statuscode != 200:
+                logging.warning(f"Failed to list notion users: {statuscode}")
+                return None
+            for user in response["results"]:
+                users[user["id"]] = user
+            if not response.get("has_more"):
+                return users
+            params["start_cursor"] = response["next_cursor"]
+
+    async def _fetch_user(
+        self, userid: str, token: str, workspace: WorkspaceUsers
+    ) -> Optional[dict]:
+        statuscode, response = await notion_request("GET", f"/users/{userid}", token)
+        if statuscode != 200:
+            logging.warning(f"Failed to get notion user {userid}: {statuscode}")
+            if 400 <= statuscode < 500:
+                # 없거나 볼 수 없는 사용자, 서버 오류는 다음에 다시 시도
+                workspace.missing[userid] = time.monotonic() + self.negative_ttl
+            return None
+        workspace.users[userid] = response
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "workspaces": {
+                hashlib.sha256(token.encode()).hexdigest()[:12]: len(workspace.users)
+                for token, workspace in self.workspaces.items()
+            },
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+        }
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket. Waiting callers are served in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()  # asyncio.Lock은 대기 순서대로 깨움 (FIFO)
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """
+        Wait until a token is available and consume it.
+        :return: seconds spent waiting
+        """
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.blocked_until:
+                        # Retry-After 기간 동안은 아무도 요청하지 않음
+                        await asyncio.sleep(self.blocked_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def block(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for the given seconds (e.g. Retry-After).
+        """
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.blocked_until  # 차단 기간 동안은 토큰이 쌓이지 않음
+        self.throttled += 1
+
+    def idle(self, now: float, ttl: float) -> bool:
+        """
+        Whether the bucket is unused for ttl seconds, full and not blocked,
+        i.e. a new bucket would behave the same.
+        """
+        if self.waiting or now < self.blocked_until or now - self.updated < ttl:
+            return False
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+        }
+
+
+class KeyedRateLimiter:
+    """
+    One token bucket per key (e.g. per Notion integration token).
+    Idle buckets are dropped, so keys that are no longer used don't pile up.
+    """
+
+    def __init__(self, rate: float, capacity: float, idle_ttl: float = 600):
+        """
+        :param idle_ttl: seconds a bucket is kept after its last use
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self.buckets: dict[str, TokenBucket] = {}
+        self.swept = time.monotonic()
+
+    def sweep(self, now: float) -> None:
+        """
+        Drop the buckets that are idle (see TokenBucket.idle).
+        """
+        self.swept = now
+        for key in [k for k, b in self.buckets.items() if b.idle(now, self.idle_ttl)]:
+            del self.buckets[key]
+
+    def bucket(self, key: str) -> TokenBucket:
+        now = time.monotonic()
+        if now - self.swept >= self.idle_ttl:
+            self.sweep(now)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self.buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, key: str) -> float:
+        return await self.bucket(key).acquire()
+
+    def block(self, key: str, seconds: float) -> None:
+        self.bucket(key).block(seconds)
+
+    def stats(self) -> dict:
+        """
+        Stats per bucket. Keys are hashed so tokens never leave the process.
+        """
+        return {
+            hashlib.sha256(key.encode()).hexdigest()[:12]: bucket.stats()
+            for key, bucket in self.buckets.items()
+        }
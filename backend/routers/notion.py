@@ -1,15 +1,33 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from typing import Optional
 
-from cachetools import TTLCache
+from breaker import UpstreamUnavailable
+from caches import (get_notion_database_meta_cache_service,
+                    get_notion_page_object_cache_service,
+                    get_notion_page_title_cache_service,
+                    get_notion_schema_cache_service)
+from coalesce import CoalescedEntry, KeyedCoalescer
 from common import *
-from fastapi import (APIRouter, BackgroundTasks, Body, Depends, HTTPException,
+from db.models import NotionPages
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query,
                      Request)
 from fastapi import status as HTTPStatus
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from notionprops import PropertyExtractor, content_hash, page_title, page_url
+from notionusers import NotionUserDirectory
 from pydantic import BaseModel
-from services import discordservice, notionservice
+from routing import WebhookRoute
+from services import notionservice
+from tasks.webhookworker import webhook_worker_pool
 
 router = APIRouter(prefix="/notion", tags=["Notion"])
+database_meta_cache = get_notion_database_meta_cache_service()
+schema_cache = get_notion_schema_cache_service()
+page_title_cache = get_notion_page_title_cache_service()
+page_cache = get_notion_page_object_cache_service()
 
 
 @router.post("/external/databases")
@@ -18,12 +36,8 @@ async def fetch_databases(request: Request, token: str = Body(...)):
     """
     get all databases the token has access to
     """
-    url = NOTION_API_URL + "/search"
-    headers = notionHeaders(token)
     data = {"filter": {"property": "object", "value": "database"}, "query": ""}
-    statuscode, response = await make_request(
-        url=url, headers=headers, method="POST", json=data, internal=False
-    )
+    statuscode, response = await notion_request("POST", "/search", token, json=data)
     if statuscode != 200:
         raise HTTPException(status_code=statuscode, detail=response)
     return JSONResponse(content={"status": "success", "data": response})
@@ -40,9 +54,8 @@ async def fetch_database(request: Request, items: NotionDatabaseFetchRequest):
     """
     Fetch the database from Notion.
     """
-    url = NOTION_API_URL + f"/databases/{items.databaseid}"
-    status, response = await make_request(
-        url=url, headers=notionHeaders(items.token), method="GET"
+    status, response = await notion_request(
+        "GET", f"/databases/{items.databaseid}", items.token
     )
     if status != 200:
         raise HTTPException(status_code=status, detail=response)
@@ -90,6 +103,8 @@ async def delete_database(
     """
     # Remove the token from the database
     notiondb = await notionservice.delete_notion_database(conn, databaseid)
+    database_meta_cache.delete(databaseid)
+    schema_cache.delete(databaseid)
     if not notiondb:
         return Response(status_code=HTTPStatus.HTTP_204_NO_CONTENT)
     channelid = notiondb.channel_id
@@ -132,179 +147,672 @@ async def toggle_block(request: Request, pageid: str, conn=Depends(get_db)):
     return JSONResponse(content={"status": "success", "data": res.blocked})
 
 
+class NotionPageAck(BaseModel):
+    pageid: str
+    version: int
+    hash: Optional[str] = None
+
+
 @router.post("/notionpage/updated")
 @checkInternalServer
 async def set_page_updated(
-    request: Request, threadids: list[int] = Body(...), conn=Depends(get_db)
+    request: Request, acks: list[NotionPageAck] = Body(...), conn=Depends(get_db)
 ):
-    await notionservice.set_pages_updated(conn, threadids)
-    return JSONResponse(
-        content={"status": "success", "message": "Page updated successfully"}
+    """
+    Acknowledge the pages the bot has handled (sent or skipped as unchanged).
+    Returns the pages that were edited again after they were fetched.
+    """
+    changed = await notionservice.ack_pages(
+        conn, [(ack.pageid, ack.version, ack.hash) for ack in acks]
     )
+    return JSONResponse(content={"status": "success", "data": {"changed": changed}})
 
 
 @router.get("/notionpage/updated")
 @checkInternalServer
-async def get_all_updated(request: Request, conn=Depends(get_db)):
+async def get_all_updated(
+    request: Request,
+    stream: int = 0,
+    pageids: Optional[list[str]] = Query(None),
+    worker: Optional[str] = None,
+    lease: int = 300,
+    shard: int = 0,
+    shards: int = 1,
+    limit: int = 500,
+    conn=Depends(get_db),
+):
     """
     Get all updated pages from the database.
+    Databases and pages are fetched from Notion concurrently, bounded by a
+    global limit and a per-token limit. Results keep the order of the rows.
+    :param stream: if set, pages are sent as newline-delimited JSON as soon as
+        they are parsed (completion order) instead of one JSON body
+    :param pageids: only return these pages (the ones pushed to the bot)
+    :param worker: claim the pages for this worker, so that other workers
+        polling at the same time don't get them (lease released on ack).
+        Without a worker, pages currently leased to a worker are left out
+    :param lease: seconds the claimed pages stay leased to the worker
+    :param shard: shard of the worker, pages are partitioned by server id
+    :param shards: number of shards
+    :param limit: maximum number of pages claimed by the worker at once
+    """
+    if upstream_breakers.is_open(NOTION_API_URL):
+        # 노션 장애 중에는 페이지를 점유하지 않고 이번 폴링을 건너뜀
+        logging.warning("Notion is unavailable, skipping the poll cycle")
+        return Response(status_code=HTTPStatus.HTTP_204_NO_CONTENT)
+    try:
+        return await updated_pages_response(
+            conn, stream, pageids, worker, lease, shard, shards, limit
+        )
+    except UpstreamUnavailable as e:
+        # 점유한 페이지는 updated_pages_response 에서 이미 반납함
+        logging.warning(f"Skipping the poll cycle: {e}")
+        return Response(status_code=HTTPStatus.HTTP_204_NO_CONTENT)
+
+
+async def updated_pages_response(
+    conn,
+    stream: int,
+    pageids: Optional[list[str]],
+    worker: Optional[str],
+    lease: int,
+    shard: int,
+    shards: int,
+    limit: int = 500,
+) -> Response:
     """
-    res = await notionservice.get_all_updated_pages(conn)
+    get_all_updated without the breaker check, see its parameters.
+    """
+    prefetched = {}
+    if NOTION_SYNC_MODE == "query" and pageids is None:
+        # 웹훅을 놓친 경우도 잡아내고, 쿼리 결과를 페이지 조회 대신 사용
+        prefetched = await sync_databases(conn)
+    if worker:
+        pageids = await notionservice.claim_updated_pages(
+            conn, worker, lease, pageids, shard, shards, limit
+        )
+        if not pageids:
+            return Response(status_code=HTTPStatus.HTTP_204_NO_CONTENT)
+    # worker 없이 호출하면 다른 워커가 점유 중인 페이지는 빼고 보냄 (중복 전송 방지)
+    res = await notionservice.get_all_updated_pages(
+        conn, pageids, unleased=not worker
+    )
     if not res:
         return Response(status_code=HTTPStatus.HTTP_204_NO_CONTENT)
-    returndict = []
-    updateddatabase = []
-    corrupteddatabases = []
-    for row in res:
-        page, databaseid, channelid, token, tags = row
-        if databaseid in corrupteddatabases:
-            continue  # Skip if the database is already marked as corrupted
-        if not token:
-            continue  # No token found, skip this page
-        # Notion 페이지 정보 조회
-        if databaseid not in updateddatabase:
-            url = NOTION_API_URL + f"/databases/{databaseid}"
-            status, response = await make_request(
-                url=url, headers=notionHeaders(token), method="GET"
-            )
-            if status != 200:
-                corrupteddatabases.append(databaseid)
+    rows = await refresh_databases(conn, res)
+    if stream:
+        return StreamingResponse(
+            stream_updated_pages(rows, prefetched, worker),
+            media_type="application/x-ndjson",
+        )
+    try:
+        pages = [item async for item in iter_updated_pages(rows, prefetched)]
+    except UpstreamUnavailable:
+        if worker:
+            await release_unsent_pages(worker, [row[0].page_id for row in rows])
+        raise
+    pages.sort(key=lambda item: item[0])
+    returndict = [pagedict for _, pagedict in pages]
+
+    # 결과를 JSON 형식으로 반환
+    return JSONResponse(content={"status": "success", "data": returndict})
+
+
+async def refresh_databases(conn, rows: list) -> list:
+    """
+    Refresh the metadata of the databases the rows belong to.
+    :return: rows that have a token and whose database is reachable
+    """
+    # 토큰이 없는 페이지는 건너뛰고, 데이터베이스별로 토큰을 모음
+    rows = [row for row in rows if row[3]]
+    databasetokens = {}
+    for page, databaseid, channelid, token, tags in rows:
+        # 캐시된 메타데이터가 있으면 (TTL 이내, database.* 웹훅 없음) 다시 조회하지 않음
+        if database_meta_cache.get(databaseid) is None:
+            databasetokens.setdefault(databaseid, token)
+    # 변경되었을 수 있는 데이터베이스 정보만 동시 조회
+    databases = await asyncio.gather(
+        *(
+            get_database_func(databaseid, token)
+            for databaseid, token in databasetokens.items()
+        )
+    )
+    corrupteddatabases = set()
+    for databaseid, response in zip(databasetokens, databases):
+        if response is None:
+            corrupteddatabases.add(databaseid)
+            continue
+        databasetitle = response["title"][0]["plain_text"]
+        # 세션은 동시에 사용할 수 없으므로 DB 쓰기는 순차적으로 처리
+        # 제목이 바뀐 경우에만 실제로 DB에 기록됨
+        await notionservice.set_notion_database_name(conn, databaseid, databasetitle)
+        # 스키마 버전이 바뀐 경우에만 속성 추출기를 다시 컴파일
+        get_property_extractor(
+            databaseid, response["properties"], response.get("last_edited_time")
+        )
+        database_meta_cache.set(
+            databaseid,
+            {
+                "title": databasetitle,
+                "last_edited_time": response.get("last_edited_time"),
+            },
+        )
+    # 손상된 데이터베이스의 페이지는 건너뜀
+    return [row for row in rows if row[1] not in corrupteddatabases]
+
+
+async def iter_updated_pages(rows: list, prefetched: Optional[dict] = None):
+    """
+    Fetch and parse the pages of the rows concurrently.
+    Yields (row index, pagedict) in completion order. At most
+    NOTION_FETCH_CONCURRENCY fetched pages are held at once.
+    :param prefetched: page id -> page object already returned by a database query
+    """
+    queue = asyncio.Queue(maxsize=NOTION_FETCH_CONCURRENCY)
+    pending = iter(enumerate(rows))
+    prefetched = prefetched or {}
+
+    async def worker():
+        for idx, row in pending:  # 워커들이 같은 iterator를 공유
+            page, databaseid, channelid, token, tags = row
+            pagedata = prefetched.get(page.page_id)
+            if pagedata is None:
+                try:
+                    pagedata = await get_updated_page(page, token)
+                except UpstreamUnavailable as e:
+                    # 노션이 차단되면 남은 페이지도 실패하므로 폴링을 중단
+                    await queue.put((idx, row, e))
+                    return
+            await queue.put((idx, row, pagedata))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(NOTION_FETCH_CONCURRENCY, len(rows)))
+    ]
+    try:
+        for _ in range(len(rows)):
+            idx, row, pagedata = await queue.get()
+            if isinstance(pagedata, UpstreamUnavailable):
+                raise pagedata
+            if not pagedata:
+                # 페이지 정보를 노션에서 가져오지 못한 경우
+                # 주로 페이지가 삭제된 경우 -> 디스코드에서도 적절히 조치
                 continue
-            databasetitle = response["title"][0]["plain_text"]
-            await notionservice.set_notion_database_name(
-                conn, databaseid, databasetitle
+            page, databaseid, channelid, token, tags = row
+            pagedict = {
+                "pageid": page.page_id,
+                "version": page.version,
+                "threadid": page.thread_id,
+                "channelid": channelid,
+                "status": True,
+                "tags": [],
+            }
+            pagedict = apply_properties(databaseid, pagedict, pagedata, tags)
+            if "pagetitle" in pagedict:
+                page_title_cache.set(page.page_id, pagedict["pagetitle"])
+            # 디스코드에 보이는 내용이 같으면 봇은 API 호출 없이 ack만 함
+            pagedict["hash"] = content_hash(pagedict)
+            pagedict["unchanged"] = (
+                page.thread_id is not None and page.content_hash == pagedict["hash"]
+            )
+            yield idx, pagedict
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+async def stream_updated_pages(
+    rows: list, prefetched: Optional[dict] = None, worker: Optional[str] = None
+):
+    """
+    Newline-delimited JSON body for the streaming mode of get_all_updated.
+    If Notion becomes unavailable the stream ends early and the pages that
+    weren't sent are released.
+    """
+    unsent = {row[0].page_id for row in rows}
+    try:
+        async for _, pagedict in iter_updated_pages(rows, prefetched):
+            unsent.discard(pagedict["pageid"])
+            yield json.dumps(pagedict) + "\n"
+    except UpstreamUnavailable as e:
+        # 응답은 이미 시작되었으므로 204 대신 스트림을 여기서 끝냄
+        logging.warning(f"Ending the poll stream early: {e}")
+        if worker:
+            await release_unsent_pages(worker, list(unsent))
+
+
+async def release_unsent_pages(worker: str, pageids: list[str]) -> None:
+    """
+    Release the leases of claimed pages a poll could not send, so they are
+    picked up by the next poll instead of waiting for the lease to expire.
+    """
+    try:
+        # 스트리밍 중에는 요청의 세션이 이미 닫혔을 수 있으므로 새 세션 사용
+        async with async_session() as conn:
+            await notionservice.release_page_leases(conn, worker, pageids)
+    except Exception as e:
+        logging.error(f"Failed to release {len(pageids)} page leases: {e}")
+
+
+async def sync_databases(conn) -> dict:
+    """
+    Query every linked database for pages edited since its watermark and mark
+    them as updated. This catches changes whose webhook was missed, and one
+    query call returns up to 100 pages instead of one GET per page.
+    :return: page id -> page object of the pages that were found
+    """
+    databases = await notionservice.get_query_sync_databases(conn)
+    results = await asyncio.gather(
+        *(
+            query_database_changes(database.database_id, token, database.sync_watermark)
+            for database, token in databases
+        )
+    )
+    prefetched = {}
+    for (database, token), result in zip(databases, results):
+        if result is None:
+            continue
+        pages, watermark = result
+        if pages:
+            marked = await notionservice.mark_update_notion_pages(
+                conn,
+                database.database_id,
+                {page["id"]: page["last_edited_time"] for page in pages},
+            )
+            pages = {page["id"]: page for page in pages}
+            prefetched.update({pageid: pages[pageid] for pageid in marked})
+        if watermark != database.sync_watermark:
+            await notionservice.set_sync_watermark(
+                conn, database.database_id, watermark
             )
-            updateddatabase.append(databaseid)
-        # Notion 페이지 정보 파싱
-        pagedict = {
-            "pageid": page.page_id,
-            "threadid": page.thread_id,
-            "channelid": channelid,
-            "status": True,
-            "tags": [],
+    return prefetched
+
+
+async def query_database_changes(
+    databaseid: str, token: str, watermark: Optional[str]
+) -> Optional[tuple[list[dict], str]]:
+    """
+    Query the pages of a database edited at or after the watermark.
+    last_edited_time only has minute precision, so the watermark minute is
+    queried again. Its pages are only marked again if their last_edited_time
+    moved past the stored one (see mark_update_notion_pages).
+    :return: (pages sorted by last_edited_time, new watermark), None on error
+    """
+    endpoint = f"/databases/{databaseid}/query"
+    sorts = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+    if watermark is None:
+        # 첫 동기화: 기존 페이지를 모두 보내지 않고 워터마크만 잡음
+        body = {
+            "sorts": [{"timestamp": "last_edited_time", "direction": "descending"}],
+            "page_size": 1,
         }
-        pagedata = await get_page_func(page.page_id, token, forcereload=True)
-        if pagedata:
-            # 페이지 제목과 URL 파싱
-            prop = pagedata["properties"]
-            pagedict["pageurl"] = pagedata["url"]
-            pagedict["props"] = {}
-            for item in prop:
-                if prop[item]["type"] == "title":
-                    if prop[item]["title"]:
-                        pagedict["pagetitle"] = prop[item]["title"][0]["plain_text"]
-                    else:
-                        pagedict["status"] = False
-                        continue
-                else:
-                    match prop[item]["type"]:
-                        case "rich_text":
-                            pagedict["props"][item] = (
-                                prop[item]["rich_text"][0]["plain_text"]
-                                if prop[item]["rich_text"]
-                                else ""
-                            )
-                        case "select":
-                            pagedict["props"][item] = (
-                                prop[item]["select"]["name"]
-                                if prop[item]["select"]
-                                else ""
-                            )
-                            if item in tags:
-                                pagedict["tags"].append(
-                                    pagedict["props"][item]
-                                )  # tag for discord forum channel
-                        case "multi_select":
-                            pagedict["props"][item] = [tag["name"]
-                                                       for tag in prop[item]["multi_select"]]
-                        case "checkbox":
-                            pagedict["props"][item] = prop[item]["checkbox"]
-                        case "number":
-                            pagedict["props"][item] = prop[item]["number"]
-                        case "date":
-                            if prop[item]["date"] is not None:
-                                start = prop[item]["date"]["start"]
-                                end = prop[item]["date"]["end"]
-                                if start and end:
-                                    pagedict["props"][item] = f"{start} ~ {end}"
-                                elif start:
-                                    pagedict["props"][item] = start
-                                elif end:
-                                    pagedict["props"][item] = end
-                        case "people":
-                            pagedict["props"][item] = [
-                                user["name"] for user in prop[item]["people"]
-                            ]
-                        case "files":
-                            pagedict["props"][item] = [
-                                file["name"] for file in prop[item]["files"]
-                            ]
-                        case "url":
-                            pagedict["props"][item] = prop[item]["url"]
-                        case "status":
-                            pagedict["props"][item] = (
-                                prop[item]["status"]["name"]
-                                if prop[item]["status"]
-                                else ""
-                            )
-                            if item in tags:
-                                pagedict["tags"].append(
-                                    pagedict["props"][item]
-                                )  # tag for discord forum channel
-                        case _:
-                            # print(f"Unknown type: {prop[item]['type']}")
-                            pagedict["props"][item] = prop[item]["type"] + \
-                                " under dev"
-            # 페이지 정보 추가
-            returndict.append(pagedict)
-        else:
-            pagedict["status"] = False
-            # 페이지 정보를 노션에서 가져오지 못한 경우
-            # 주로 페이지가 삭제된 경우 -> 디스코드에서도 적절히 조치
+        async with notion_fetch_slot(token):
+            status, response = await notion_request("POST", endpoint, token, json=body)
+        if status != 200:
+            return None
+        if response["results"]:
+            return [], response["results"][0]["last_edited_time"]
+        return [], datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+    body = {
+        "filter": {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": watermark},
+        },
+        "sorts": sorts,
+        "page_size": 100,
+    }
+    pages = []
+    while True:
+        async with notion_fetch_slot(token):
+            status, response = await notion_request("POST", endpoint, token, json=body)
+        if status != 200:
+            return None
+        pages.extend(response["results"])
+        if not response.get("has_more"):
+            break
+        body["start_cursor"] = response["next_cursor"]
+    if pages:
+        watermark = pages[-1]["last_edited_time"]
+    return pages, watermark
+
+
+def get_property_extractor(
+    databaseid: str, properties: dict, version: Optional[str] = None
+) -> PropertyExtractor:
+    """
+    Get the compiled property extractor of a database.
+    Compiled from the database schema when it is fetched, otherwise from the
+    page properties (they carry the same types).
+    """
+    extractor = schema_cache.get(databaseid)
+    if extractor is not None and (version is None or extractor.version == version):
+        if extractor.matches(properties):
+            return extractor
+    extractor = PropertyExtractor(properties, version)
+    schema_cache.set(databaseid, extractor)
+    return extractor
 
-    # 결과를 JSON 형식으로 반환
-    return JSONResponse(content={"status": "success", "data": returndict})
+
+def apply_properties(databaseid: str, base: dict, pagedata: dict, tags) -> dict:
+    """
+    Parse a page with the cached extractor of its database. If a property
+    changed type since the extractor was compiled, it is recompiled from the
+    page properties and the page is parsed again.
+    :param base: pagedict fields that don't come from the properties
+    """
+    properties = pagedata["properties"]
+    extractor = get_property_extractor(databaseid, properties)
+    try:
+        return extractor.apply(dict(base, tags=[]), pagedata, tags)
+    except (KeyError, TypeError):
+        # 스키마 버전이 바뀌기 전에 페이지가 먼저 새 타입으로 온 경우
+        extractor = PropertyExtractor(properties)
+        schema_cache.set(databaseid, extractor)
+        return extractor.apply(dict(base, tags=[]), pagedata, tags)
+
+
+@router.get("/ratelimit")
+@checkInternalServer
+async def get_rate_limit_stats(request: Request):
+    """
+    Get queue depth and wait time stats of the Notion API rate limiter.
+    """
+    return JSONResponse(
+        content={"status": "success", "data": notion_rate_limiter.stats()}
+    )
+
+
+@router.get("/upstreams")
+@checkInternalServer
+async def get_upstream_stats(request: Request):
+    """
+    Get the circuit breaker state of each upstream host (Notion, Discord, ...).
+    """
+    return JSONResponse(
+        content={"status": "success", "data": upstream_breakers.stats()}
+    )
 
 
 @router.post("/webhook/{serverid}")
 async def notion_webhook_listener(
     request: Request,
     serverid: int,
-    backgroundtask: BackgroundTasks,
     conn=Depends(get_db),
 ):
     """
     Webhook listener for Notion events, intended to forward the data to a Discord bot.
+    The event is stored in the inbox and processed by the webhook worker pool.
     """
     # Webhook 요청 본문을 JSON으로 파싱
     data = await request.json()
-    backgroundtask.add_task(notion_webhook_handler, data, conn, serverid)
-    # Webhook 인증 요청 처리 (verification_token 포함 여부 확인)
+    await notionservice.enqueue_webhook(conn, serverid, data)
+    webhook_worker_pool.notify()
     return JSONResponse(content={"message": "Webhook received"})
 
 
-async def notion_webhook_handler(data, conn, serverid):
+@router.get("/webhook/inbox")
+@checkInternalServer
+async def get_webhook_inbox_stats(request: Request, conn=Depends(get_db)):
+    """
+    Get the queue depth of the webhook inbox and the counters of the webhook
+    worker pool, coalescer, routing table and user directory.
+    """
+    data = await notionservice.get_webhook_inbox_stats(conn)
+    data["pool"] = webhook_worker_pool.stats()
+    data["coalescer"] = webhook_coalescer.stats()
+    data["comments"] = comment_coalescer.stats()
+    data["routes"] = notionservice.webhook_routes.stats()
+    data["users"] = user_directory.stats()
+    return JSONResponse(content={"status": "success", "data": data})
+
+
+async def notion_webhook_handler(data, conn, serverid, item) -> bool:
+    """
+    Process one webhook event from the inbox.
+    Page update marks are written right away, the Discord notification goes
+    through the webhook coalescer so a burst of events becomes one message.
+    :param item: the inbox row, held in "processing" until the coalesced
+        delivery is sent (WEBHOOK_COALESCE_MAXWAIT < WEBHOOK_VISIBILITY_TIMEOUT)
+    :return: True if the row is completed later by the coalescer flush
+    """
+    route = await notionservice.get_webhook_route(conn, serverid)
+    if route is None:
+        return False  # 모르는 서버 (채널도 토큰도 없음)
+    if "verification_token" in data:
+        event = await build_webhook_event(route, data, 1)
+        if event is not None:
+            # 봇이 보내지 못하면 예외가 그대로 올라가서 인박스에서 재시도됨
+            failed, error = await deliver_to_bot("notionwebhooks", [event])
+            if failed:
+                raise error
+        return False
+    entity = data["entity"]
+    if entity["type"] == "database":
+        # 데이터베이스가 변경되었으므로 다음 폴링 때 메타데이터를 다시 조회
+        database_meta_cache.delete(entity["id"])
+    if entity["type"] == "page" and data["data"]["parent"]["type"] == "database":
+        parentid = data["data"]["parent"]["id"]
+        # 연결된 데이터베이스의 페이지면 추후 디스코드에 정보 전송을 위해 업데이트 플래그 설정
+        if parentid in route.database_ids:
+            await updatePage(conn, entity["id"], parentid)
+    if entity["type"] == "comment":
+        # 댓글은 페이지의 디스코드 스레드로 보냄 (일정 간격으로 모아서)
+        if data["type"] in COMMENT_SYNC_EVENTS:
+            key = (serverid, data["data"]["page_id"], data["data"]["parent"]["id"])
+            comment_coalescer.submit(key, ((entity["id"], data["type"]), item))
+            return True
+        return False
+    webhook_coalescer.submit((serverid, entity["id"], data["type"]), (data, item))
+    return True
+
+
+COMMENT_SYNC_EVENTS = {"comment.created", "comment.updated"}
+
+
+async def flush_comments(entries: list[CoalescedEntry]):
+    """
+    Send the comments collected during the flush interval to the page threads,
+    one batch per (server, page, discussion block).
+    The inbox rows of the comments are completed once the bot has sent them.
+    """
+    results = await asyncio.gather(
+        *[build_comment_batch(entry) for entry in entries],
+        return_exceptions=True,
+    )
+    batches = []
+    sent = []  # 배치마다 합쳐진 인박스 행들
+    done = []
+    for entry, result in zip(entries, results):
+        items = [item for _, item in entry.items]
+        if isinstance(result, Exception):
+            serverid, pageid, blockid = entry.key
+            logging.error(
+                f"Failed to sync {entry.count} comments of {pageid}: {result}"
+            )
+            await webhook_worker_pool.fail(items, result)
+        elif result is None:
+            done.extend(items)  # 디스코드 스레드가 없는 페이지
+        else:
+            batches.append(result)
+            sent.append(items)
+    if batches:
+        failed, error = await deliver_to_bot("notioncomments", batches)
+        if failed:
+            logging.error(f"Failed to send {len(failed)} comment batches: {error}")
+            await webhook_worker_pool.fail(
+                [item for index in failed for item in sent[index]], error
+            )
+        for index, items in enumerate(sent):
+            if index not in failed:
+                done.extend(items)
+    await webhook_worker_pool.complete(done)
+
+
+async def build_comment_batch(entry: CoalescedEntry) -> Optional[dict]:
+    serverid, pageid, blockid = entry.key
+    async with async_session() as conn:
+        route = await notionservice.get_webhook_route(conn, serverid)
+        page = await notionservice.get_notion_page(conn, pageid)
+    if route is None or not route.token or page is None or page.thread_id is None:
+        return None  # 디스코드 스레드가 없는 페이지
+    events = {}
+    for (commentid, eventtype), _ in entry.items:
+        events.setdefault(commentid, eventtype)
+    comments = await fetch_comments(blockid, route.token, set(events))
+    result = []
+    for comment in sorted(comments, key=lambda c: c["created_time"]):
+        author = await user_directory.get(comment["created_by"]["id"], route.token)
+        result.append(
+            {
+                "author": author["name"] if author else None,
+                "avatar_url": author["avatar_url"] if author else None,
+                "text": "".join(text["plain_text"] for text in comment["rich_text"]),
+                "created_time": comment["created_time"],
+                "edited": events[comment["id"]] == "comment.updated",
+            }
+        )
+    if not result:
+        return None
+    return {"threadid": page.thread_id, "pageid": pageid, "comments": result}
+
+
+async def fetch_comments(blockid: str, token: str, commentids: set[str]) -> list[dict]:
+    """
+    Fetch the given comments of a page or block with the comments list endpoint.
+    Pages through the discussion until every requested comment is found.
+    """
+    found = []
+    params = {"block_id": blockid, "page_size": 100}
+    while commentids:
+        statuscode, response = await notion_request(
+            "GET", "/comments", token, params=params
+        )
+        if statuscode != 200:
+            logging.warning(f"Failed to list notion comments {blockid}: {statuscode}")
+            break
+        for comment in response["results"]:
+            if comment["id"] in commentids:
+                commentids.discard(comment["id"])
+                found.append(comment)
+        if not response.get("has_more"):
+            break
+        params["start_cursor"] = response["next_cursor"]
+    return found
+
+
+async def flush_webhook_events(entries: list[CoalescedEntry]):
+    """
+    Enrich one event per coalesced (server, entity, event type) and deliver
+    all of them to the bot in one request.
+    The inbox rows of the events are completed once the bot has sent them,
+    and failed (retried by the inbox) if building or sending them fails.
+    """
+    results = await asyncio.gather(
+        *[build_coalesced_webhook(entry) for entry in entries],
+        return_exceptions=True,
+    )
+    events = []
+    sent = []  # 이벤트마다 합쳐진 인박스 행들
+    done = []
+    for entry, result in zip(entries, results):
+        items = [item for _, item in entry.items]
+        if isinstance(result, Exception):
+            serverid, entityid, eventtype = entry.key
+            logging.error(
+                f"Failed to build {entry.count} {eventtype} events of {entityid}: "
+                f"{result}"
+            )
+            await webhook_worker_pool.fail(items, result)
+        elif result is None:
+            done.extend(items)  # 보낼 것이 없는 이벤트
+        else:
+            events.append(result)
+            sent.append(items)
+    if events:
+        failed, error = await deliver_to_bot("notionwebhooks", events)
+        if failed:
+            logging.error(f"Failed to send {len(failed)} webhook events: {error}")
+            await webhook_worker_pool.fail(
+                [item for index in failed for item in sent[index]], error
+            )
+        for index, items in enumerate(sent):
+            if index not in failed:
+                done.extend(items)
+    await webhook_worker_pool.complete(done)
+
+
+async def deliver_to_bot(function: str, batch: list) -> tuple[set[int], Exception]:
+    """
+    Send a batch to a bot function that reports what it couldn't deliver.
+    :return: indexes of the failed batch items and the error to record
+    """
+    try:
+        status, response = await call_bot(function, batch)
+    except Exception as e:
+        return set(range(len(batch))), e
+    if status != 200 or not isinstance(response, dict):
+        # 봇 함수에서 예외가 나면 MyFunctions.run 이 None 을 돌려줌
+        error = RuntimeError(f"{function} returned {status}: {response}")
+        return set(range(len(batch))), error
+    failed = set(response.get("failed", []))
+    return failed, RuntimeError(f"{function} could not deliver {len(failed)} items")
+
+
+async def build_coalesced_webhook(entry: CoalescedEntry) -> Optional[dict]:
+    serverid, entityid, eventtype = entry.key
+    async with async_session() as conn:
+        route = await notionservice.get_webhook_route(conn, serverid)
+    if route is None:
+        return None
+    # 가장 최근 이벤트 기준으로 작성자, 시각을 보여줌
+    data, _ = entry.items[-1]
+    return await build_webhook_event(route, data, entry.count)
+
+
+async def build_webhook_event(
+    route: WebhookRoute, data, count: int
+) -> Optional[dict]:
+    """
+    Enrich a webhook event (author, page title and url) for the bot.
+    :param route: routing table entry of the server the event belongs to
+    :param count: number of events this one stands for
+    :return: None if there is nothing to send
+    """
     webhookdata = {}
-    # 해당 serverid의 Discord 서버 정보 조회 (DB에서)
-    server = await discordservice.get_discord_server(conn, serverid)
-    webhookdata["channelid"] = (
-        server.webhook_channel_id
-    )  # 메시지를 보낼 디스코드 채널 ID
+    webhookdata["channelid"] = route.channel_id  # 메시지를 보낼 디스코드 채널 ID
     if "verification_token" in data:
         webhookdata["verification_token"] = data["verification_token"]
     else:
         # 일반 웹훅 이벤트 처리
         author = data["authors"][0]["id"]
+        webhookdata["author"] = None  # 사용자 조회에 실패하면 None
         webhookdata["avatar_url"] = None
-        # Notion 토큰 조회 (서버에 연결된 토큰)
-        token = await notionservice.get_notion_token(conn, serverid)
+        # 서버에 연결된 Notion 토큰
+        token = route.token
         if not token:
-            return JSONResponse(
-                content={"status": "error", "message": "No token found"},
-                status_code=400,
-            )
+            return
+        # 페이지 관련 정보 기본값 초기화
+        webhookdata["pageurl"] = None
+        webhookdata["pagetitle"] = None
+        # 제목이 있는 페이지 이벤트만 디스코드로 보냄
+        if data["entity"]["type"] != "page":
+            return
+        pageid = data["entity"]["id"]
+        title = page_title_cache.get(pageid) if WEBHOOK_LAZY_ENRICHMENT else None
+        if title:
+            # 폴링이 채워둔 제목을 쓰고 URL은 id로 만듦 (페이지 GET 생략)
+            webhookdata["pagetitle"] = title
+            webhookdata["pageurl"] = page_url(pageid)
+        else:
+            # 페이지 정보 가져와서 제목과 URL 파싱
+            pagedata = await get_page_func(pageid, token)
+            if pagedata:
+                webhookdata["pagetitle"] = page_title(pagedata["properties"])
+                webhookdata["pageurl"] = pagedata["url"]
+        if not webhookdata["pagetitle"]:
+            return
         # Notion 사용자 정보 조회 (작성자)
-        userdata = await get_user_func(author, token)
+        userdata = await user_directory.get(author, token)
         if userdata:
             webhookdata["author"] = userdata["name"]
             if userdata["avatar_url"]:
@@ -314,103 +822,129 @@ async def notion_webhook_handler(data, conn, serverid):
         webhookdata["type"] = data["type"]
         webhookdata["timestamp"] = data["timestamp"]
         webhookdata["workspace_name"] = data["workspace_name"]
-        # 페이지 관련 정보 기본값 초기화
-        webhookdata["pageurl"] = None
-        webhookdata["pagetitle"] = None
-        webhookdata["pageid"] = None
+        webhookdata["pageid"] = pageid
         webhookdata["parentid"] = None
-        # 웹훅 엔티티가 페이지일 경우 추가 정보 처리
-        if data["entity"]["type"] == "page":
-            pageid = data["entity"]["id"]
-            webhookdata["pageid"] = pageid
-            if data["data"]["parent"]["type"] == "database":
-                parentid = data["data"]["parent"]["id"]
-                # 부모 데이터베이스 캐시 조회 + 추후 디스코드에 정보 전송을 위해 업데이트 플래그 설정
-                res = await notionservice.get_notion_database(conn, parentid)
-                if res:
-                    await updatePage(conn, pageid, parentid)
-            # 페이지 정보 가져와서 제목과 URL 파싱
-            pagedata = await get_page_func(pageid, token)
-            if pagedata:
-                for item in pagedata["properties"]:
-                    if pagedata["properties"][item].get("type") == "title":
-                        if pagedata["properties"][item]["title"]:
-                            webhookdata["pagetitle"] = pagedata["properties"][item][
-                                "title"
-                            ][0]["text"]["content"]
-                webhookdata["pageurl"] = pagedata["url"]
-    # webhookdata를 JSON 문자열로 직렬화
-    if not webhookdata["pagetitle"]:
-        return JSONResponse(content={"message": "Webhook received"})
-    webhookdata = json.dumps(webhookdata)
-    # 채널이 연결되어 있는지 확인 (없으면 에러)
-    if server.webhook_channel_id is None:
-        return JSONResponse(
-            content={
-                "status": "error",
-                "message": "No channel linked"},
-            status_code=400)
-    # Discord bot 서버에 요청 전송 (notion webhook 전달)
-    try:
-        url = discordbot + DISCORD_APP_ROOT + f"/call/notionwebhook"
-        await make_request(method="GET", url=url, params={"params": webhookdata})
-        # TODO: 이것도 왜 GET 요청 보냄? 지금 API 설계가 이상함
-    except Exception as e:
-        # 디코 봇이 꺼져 있는 경우인데 그냥 무시
-        pass
-    return JSONResponse(content={"message": "Webhook received"})
+        webhookdata["count"] = count
+    # 채널이 연결되어 있는지 확인 (없으면 무시)
+    if route.channel_id is None:
+        return None
+    return webhookdata
 
 
 # ======================================================================
 
-page_cache = TTLCache(maxsize=100, ttl=60 * 60)  # 1 hour
+notion_fetch_semaphore = asyncio.Semaphore(NOTION_FETCH_CONCURRENCY)
+notion_token_semaphores: dict[str, asyncio.Semaphore] = {}
+notion_token_users: dict[str, int] = {}  # 토큰 세마포어를 잡고 있거나 기다리는 호출 수
 
 
-async def get_page_func(
-    pageid: str, token: str, forcereload: bool = False
-) -> Optional[dict]:
+@asynccontextmanager
+async def notion_fetch_slot(token: str):
     """
-    Get the page information from Notion.
+    Limit concurrent Notion fetches, both globally and per token.
+    A token's semaphore is dropped once no fetch holds or waits for it.
     """
-    if not forcereload:
-        cached = page_cache.get(pageid)
-        if cached:
-            return cached
-    url = NOTION_API_URL + f"/pages/{pageid}"
-    statuscode, response = await make_request(
-        url=url, headers=notionHeaders(token), method="GET", internal=False
-    )
-    if statuscode != 200:
-        raise None
-    page_cache[pageid] = response
+    semaphore = notion_token_semaphores.get(token)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(NOTION_TOKEN_CONCURRENCY)
+        notion_token_semaphores[token] = semaphore
+    notion_token_users[token] = notion_token_users.get(token, 0) + 1
+    try:
+        async with semaphore, notion_fetch_semaphore:
+            yield
+    finally:
+        notion_token_users[token] -= 1
+        if not notion_token_users[token]:
+            del notion_token_users[token]
+            del notion_token_semaphores[token]
+
+
+async def get_database_func(databaseid: str, token: str) -> Optional[dict]:
+    """
+    Get the database information from Notion.
+    """
+    async with notion_fetch_slot(token):
+        status, response = await notion_request(
+            "GET", f"/databases/{databaseid}", token
+        )
+    if status != 200:
+        return None
     return response
 
 
-user_cache = TTLCache(maxsize=100, ttl=12 * 60 * 60)
+async def get_updated_page(page: NotionPages, token: str) -> Optional[dict]:
+    """
+    Fetch an updated page for the poll cycle, a failed fetch is treated as missing.
+    UpstreamUnavailable is raised, so the page isn't mistaken for a deleted one.
+    """
+    try:
+        async with notion_fetch_slot(token):
+            return await get_page_func(page.page_id, token, forcereload=True)
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        logging.warning(f"Failed to fetch notion page {page.page_id}: {e}")
+        return None
 
 
-async def get_user_func(notionuserid: str, token: str):
+async def get_page_func(
+    pageid: str, token: str, forcereload: bool = False
+) -> Optional[dict]:
     """
-    Get the user information from Notion.
+    Get the page information from Notion.
+    Concurrent cache misses of the same page share one request.
     """
-    response = user_cache.get(notionuserid)
-    if response:
-        return response
-    url = NOTION_API_URL + f"/users/{notionuserid}"
-    statuscode, response = await make_request(
-        url=url, headers=notionHeaders(token), method="GET", internal=False
-    )
+    if forcereload:
+        return await fetch_page(pageid, token)
+    return await page_cache.get_or_load(pageid, lambda: fetch_page(pageid, token))
+
+
+async def fetch_page(pageid: str, token: str) -> Optional[dict]:
+    statuscode, response = await notion_request("GET", f"/pages/{pageid}", token)
     if statuscode != 200:
-        raise None
-    user_cache[notionuserid] = response
+        logging.warning(f"Failed to get notion page {pageid}: {statuscode}")
+        return None
+    page_cache.set(pageid, response)
+    title = page_title(response["properties"])
+    if title:
+        page_title_cache.set(pageid, title)
     return response
 
 
+user_directory = NotionUserDirectory(
+    NOTION_USER_REFRESH, NOTION_USER_NEGATIVE_TTL, NOTION_USER_WORKSPACES
+)
+
+
 async def updatePage(conn, pageid: str, databaseid: str):
     """
     mark the page need to update
     """
-    await notionservice.mark_update_notion_page(conn, pageid, databaseid)
+    page = await notionservice.mark_update_notion_page(conn, pageid, databaseid)
+    if page is not None:
+        # 봇에 바로 알림 (페이지별 debounce)
+        page_push_coalescer.submit(pageid)
     return JSONResponse(
         content={"status": "success", "message": "Page updated successfully"}
     )
+
+
+async def push_updated_pages(entries: list[CoalescedEntry]):
+    """
+    Notify the bot about updated pages so it can post them right away.
+    The bot's interval poll picks up anything lost here.
+    """
+    pageids = [entry.key for entry in entries]
+    try:
+        await call_bot("notionpageupdated", {"pageids": pageids})
+    except Exception as e:
+        logging.warning(f"Failed to push {len(pageids)} updated pages to the bot: {e}")
+
+
+page_push_coalescer = KeyedCoalescer(NOTION_PUSH_DEBOUNCE, push_updated_pages)
+webhook_coalescer = KeyedCoalescer(
+    WEBHOOK_COALESCE_WINDOW, flush_webhook_events, maxwait=WEBHOOK_COALESCE_MAXWAIT
+)
+comment_coalescer = KeyedCoalescer(
+    COMMENT_FLUSH_INTERVAL, flush_comments, debounce=False
+)
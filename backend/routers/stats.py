@@ -0,0 +1,32 @@
+import logging
+
+from caches import (cache_registry, get_github_http_cache,
+                    get_webhook_routing_table)
+from common import *
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("/caches")
+@checkInternalServer
+async def get_cache_stats(request: Request, memory: int = 0, bot: int = 1):
+    """
+    Get the counters of every cache namespace (hits, misses, evictions,
+    expirations, deduplicated loads), of the backend and of the Discord bot.
+    :param memory: also estimate the memory use of each namespace (slower)
+    :param bot: also ask the Discord bot for the stats of its caches
+    """
+    data = {"backend": cache_registry.stats(bool(memory))}
+    data["backend"]["github_http"] = get_github_http_cache().stats()
+    data["backend"]["webhook_routes"] = get_webhook_routing_table().stats()
+    if bot:
+        try:
+            status, response = await call_bot("cachestats", {"memory": memory})
+            data["bot"] = response if status == 200 else None
+        except Exception as e:
+            # 봇이 꺼져 있어도 백엔드 통계는 보여줌
+            logging.warning(f"Failed to get cache stats of the bot: {e}")
+            data["bot"] = None
+    return JSONResponse(content={"status": "success", "data": data})
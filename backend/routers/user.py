@@ -1,6 +1,7 @@
 from datetime import datetime
 from functools import partial, wraps
 
+from caches import get_github_http_cache
 from common import *
 from fastapi import (APIRouter, BackgroundTasks, Body, Depends, Request,
                      Response, status)
@@ -8,6 +9,7 @@ from fastapi.responses import JSONResponse, RedirectResponse
 from services import userservice as crud
 
 router = APIRouter(prefix="/user", tags=["user"])
+github_cache = get_github_http_cache()
 
 
 @router.get("/")
@@ -173,9 +175,8 @@ async def get_user_info(conn, tokens: crud.Tokens, refreshed: bool = False):
             break
     # headers = {"Authorization": "Bearer " + GITHUB_TOKEN} # Works without
     # this... damn
-    status, response = await make_request(
-        "GET", f"{GITHUB_API_ENDPOINT}/user/{githubid}"
-    )
+    # 조건부 요청 (304는 GitHub rate limit에 포함되지 않음)
+    status, response = await github_cache.get(f"{GITHUB_API_ENDPOINT}/user/{githubid}")
     if status != 200:
         return
     gitlogin = response["login"]
@@ -183,6 +184,15 @@ async def get_user_info(conn, tokens: crud.Tokens, refreshed: bool = False):
     return response
 
 
+@router.get("/github/cache")
+@checkInternalServer
+async def get_github_cache_stats(request: Request):
+    """
+    Get the hit, 304 (revalidated) and miss counters of the GitHub HTTP cache.
+    """
+    return JSONResponse(content={"status": "success", "data": github_cache.stats()})
+
+
 @router.get("/forumthread")
 @checkInternalServer
 async def get_forum_channel(
@@ -0,0 +1,112 @@
+import time
+from typing import Iterable, Optional
+
+
+class WebhookRoute:
+    """
+    Where the webhook events of one Discord server go.
+    """
+
+    __slots__ = ("channel_id", "token", "database_ids")
+
+    def __init__(
+        self,
+        channel_id: Optional[int] = None,
+        token: Optional[str] = None,
+        database_ids: Optional[set[str]] = None,
+    ):
+        self.channel_id = channel_id
+        self.token = token
+        self.database_ids = database_ids if database_ids is not None else set()
+
+
+class WebhookRoutingTable:
+    """
+    server_id -> webhook channel, Notion token and linked databases.
+    Loaded in one query and kept up to date by the discord/notion services,
+    so the webhook path doesn't touch the database for lookups.
+    """
+
+    def __init__(self, refresh: float):
+        """
+        :param refresh: seconds after which the table is reloaded anyway
+                        (changes made by other backend instances)
+        """
+        self.refresh = refresh
+        self.routes: dict[int, WebhookRoute] = {}
+        self.databases: dict[str, int] = {}  # database_id -> server_id
+        self.loaded = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def stale(self) -> bool:
+        return time.monotonic() - self.loaded > self.refresh
+
+    def load(
+        self,
+        rows: Iterable[tuple[int, Optional[int], Optional[str], Optional[str]]],
+    ) -> None:
+        """
+        Replace the table.
+        :param rows: (server_id, webhook_channel_id, notion_token, database_id),
+                     database_id is None for servers without linked databases
+        """
+        routes: dict[int, WebhookRoute] = {}
+        databases: dict[str, int] = {}
+        for serverid, channelid, token, databaseid in rows:
+            route = routes.get(serverid)
+            if route is None:
+                route = routes[serverid] = WebhookRoute(channelid, token)
+            if databaseid is not None:
+                route.database_ids.add(databaseid)
+                databases[databaseid] = serverid
+        self.routes = routes
+        self.databases = databases
+        self.loaded = time.monotonic()
+
+    def get(self, serverid: int) -> Optional[WebhookRoute]:
+        route = self.routes.get(serverid)
+        if route is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return route
+
+    def update_server(self, serverid: int, **fields) -> None:
+        """
+        Update channel_id and/or token of a server, adding it if unknown.
+        """
+        route = self.routes.get(serverid)
+        if route is None:
+            route = self.routes[serverid] = WebhookRoute()
+        for name, value in fields.items():
+            setattr(route, name, value)
+
+    def remove_server(self, serverid: int) -> None:
+        route = self.routes.pop(serverid, None)
+        if route is None:
+            return
+        for databaseid in route.database_ids:
+            self.databases.pop(databaseid, None)
+
+    def link_database(self, serverid: int, databaseid: str) -> None:
+        route = self.routes.get(serverid)
+        if route is None:
+            route = self.routes[serverid] = WebhookRoute()
+        route.database_ids.add(databaseid)
+        self.databases[databaseid] = serverid
+
+    def unlink_database(self, databaseid: str) -> None:
+        serverid = self.databases.pop(databaseid, None)
+        route = self.routes.get(serverid)
+        if route is not None:
+            route.database_ids.discard(databaseid)
+
+    def stats(self) -> dict:
+        return {
+            "servers": len(self.routes),
+            "databases": len(self.databases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "age": time.monotonic() - self.loaded if self.loaded else None,
+        }
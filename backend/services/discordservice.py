@@ -1,13 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from caches import get_discord_server_cache_service
+from caches import (get_discord_server_cache_service,
+                    get_webhook_routing_table)
 from db.models import NotionTags, ServerInfo
 from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 discordServerCache = get_discord_server_cache_service()
+webhookRoutes = get_webhook_routing_table()
 
 
 async def update_server_info_fields(
@@ -29,6 +31,13 @@ async def update_server_info_fields(
     await conn.execute(stmt)
     await conn.commit()
     discordServerCache.set(server.server_id, server)
+    # 웹훅 라우팅 테이블에 반영
+    if "webhook_channel_id" in kwargs:
+        webhookRoutes.update_server(
+            server.server_id, channel_id=kwargs["webhook_channel_id"]
+        )
+    if "notion_token" in kwargs:
+        webhookRoutes.update_server(server.server_id, token=kwargs["notion_token"])
 
 
 async def mark_and_clean_discord_servers(
@@ -57,6 +66,7 @@ async def mark_and_clean_discord_servers(
     expired_ids = expired_result.scalars().all()
     for server_id in expired_ids:
         discordServerCache.delete(server_id)
+        webhookRoutes.remove_server(server_id)
     # Step 4: DB에서 실제 삭제
     delete_stmt = delete(ServerInfo).where(ServerInfo.updated < cutoff)
     await conn.execute(delete_stmt)
@@ -74,6 +84,7 @@ async def remove_discord_server(
     await conn.delete(server)
     await conn.commit()
     discordServerCache.delete(server_id)
+    webhookRoutes.remove_server(server_id)
     return server
 
 
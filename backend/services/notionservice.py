@@ -4,17 +4,19 @@ from typing import Optional, Sequence, Tuple
 
 from caches import *
 from db.models import *
-from sqlalchemy import Row, RowMapping, delete, select, update
+from routing import WebhookRoute
+from sqlalchemy import (Row, RowMapping, case, delete, func, or_, select,
+                        tuple_, update)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import selectinload
 
 from .discordservice import get_discord_server, update_server_info_fields
 
-notion_user_cache = get_notion_user_cache_service()
 notion_page_cache = get_notion_page_cache_service()
 notion_database_cache = get_notion_database_cache_service()
 discord_server_cache = get_discord_server_cache_service()
+webhook_routes = get_webhook_routing_table()
 
 
 async def set_notion_token(
@@ -93,6 +95,7 @@ async def link_notion_database(
     conn.add(notionlink)
     notion_database_cache.set(databaseid, notionlink)
     await conn.commit()
+    webhook_routes.link_database(discordid, databaseid)
 
 
 async def delete_notion_database(
@@ -112,6 +115,7 @@ async def delete_notion_database(
     )
     await conn.commit()
     notion_database_cache.delete(databaseid)
+    webhook_routes.unlink_database(databaseid)
     return db_obj
 
 
@@ -128,12 +132,76 @@ async def set_notion_database_name(
     db_obj = await get_notion_database(conn, databaseid)
     if db_obj is None:
         return None
+    if db_obj.database_name == name:
+        return db_obj  # 이름이 같으면 UPDATE, commit 생략
     await update_notion_database_fields(conn, db_obj, database_name=name)
     db_obj.database_name = name
     notion_database_cache.set(databaseid, db_obj)
     return db_obj
 
 
+async def get_query_sync_databases(
+    conn: AsyncSession,
+) -> Sequence[tuple[NotionDatabase, str]]:
+    """
+    Get every linked database whose server has a notion token.
+    :param conn: database connection
+    :return: list of (database, notion token)
+    """
+    query = (
+        select(NotionDatabase, ServerInfo.notion_token)
+        .join(ServerInfo, NotionDatabase.server_id == ServerInfo.server_id)
+        .where(ServerInfo.notion_token.isnot(None))
+    )
+    result = await conn.execute(query)
+    return result.all()
+
+
+async def set_sync_watermark(
+    conn: AsyncSession, databaseid: str, watermark: str
+) -> None:
+    """
+    Store the last_edited_time up to which the database has been synced.
+    :param conn: database connection
+    :param databaseid: notion database id
+    :param watermark: last_edited_time of the newest synced page
+    """
+    stmt = (
+        update(NotionDatabase)
+        .where(NotionDatabase.database_id == databaseid)
+        .values(sync_watermark=watermark)
+    )
+    await conn.execute(stmt)
+    await conn.commit()
+
+
+async def load_webhook_routes(conn: AsyncSession) -> None:
+    """
+    Load the webhook routing table (channel, token, linked databases of every
+    server) in one query.
+    """
+    query = select(
+        ServerInfo.server_id,
+        ServerInfo.webhook_channel_id,
+        ServerInfo.notion_token,
+        NotionDatabase.database_id,
+    ).outerjoin(NotionDatabase, NotionDatabase.server_id == ServerInfo.server_id)
+    webhook_routes.load((await conn.execute(query)).all())
+
+
+async def get_webhook_route(
+    conn: AsyncSession, serverid: int
+) -> Optional[WebhookRoute]:
+    """
+    Get where the webhook events of a server go, without a query unless the
+    routing table is due for a reload.
+    :return: None if the server is unknown
+    """
+    if webhook_routes.stale():
+        await load_webhook_routes(conn)
+    return webhook_routes.get(serverid)
+
+
 async def create_notion_page(
     conn: AsyncSession, pageid: str, databaseid: str
 ) -> NotionPages:
@@ -165,14 +233,72 @@ async def mark_update_notion_page(
         notionpage = await create_notion_page(conn, pageid, databaseid)
     if notionpage.blocked:  # 운이 좋으면 캐시 선에서 작업이 끝남
         return None
-    if notionpage.updated:
-        return notionpage
-    await update_notion_page_fields(conn, notionpage, updated=True)
+    # 이미 updated 상태여도 버전을 올려서, 처리 중인 ack가 플래그를 지우지 못하게 함
+    await update_notion_page_fields(
+        conn, notionpage, updated=True, version=NotionPages.version + 1
+    )
     notionpage.updated = True
+    notionpage.version = (notionpage.version or 0) + 1
     notion_page_cache.set(pageid, notionpage)
     return notionpage
 
 
+async def mark_update_notion_pages(
+    conn: AsyncSession, databaseid: str, edited: dict[str, str]
+) -> list[str]:
+    """
+    Mark many pages of a database as updated, creating the unknown ones.
+    Pages whose last_edited_time isn't newer than the one stored when they
+    were last marked are skipped, so the watermark minute queried again by
+    every sync doesn't mark the same pages each time.
+    :param conn: database connection
+    :param databaseid: notion database id
+    :param edited: notion page id -> last_edited_time
+    :return: ids of the pages that were marked
+    """
+    query = select(
+        NotionPages.page_id, NotionPages.last_edited_time, NotionPages.blocked
+    ).where(NotionPages.page_id.in_(list(edited)))
+    existing = {
+        pageid: (lastedited, blocked)
+        for pageid, lastedited, blocked in (await conn.execute(query)).all()
+    }
+    created = [pageid for pageid in edited if pageid not in existing]
+    changed = [
+        pageid
+        for pageid, (lastedited, blocked) in existing.items()
+        if not blocked and (lastedited is None or lastedited < edited[pageid])
+    ]
+    conn.add_all(
+        [
+            NotionPages(
+                page_id=pageid,
+                database_id=databaseid,
+                updated=True,
+                version=1,
+                last_edited_time=edited[pageid],
+            )
+            for pageid in created
+        ]
+    )
+    if changed:
+        stmt = (
+            update(NotionPages)
+            .where(NotionPages.page_id.in_(changed))
+            .values(
+                updated=True,
+                version=NotionPages.version + 1,
+                last_edited_time=case(
+                    {pageid: edited[pageid] for pageid in changed},
+                    value=NotionPages.page_id,
+                ),
+            )
+        )
+        await conn.execute(stmt)
+    await conn.commit()
+    return created + changed
+
+
 async def toggle_block_notion_page(
     conn: AsyncSession, pageid: str
 ) -> Optional[NotionPages]:
@@ -186,9 +312,93 @@ async def toggle_block_notion_page(
     return notionpage
 
 
+async def claim_updated_pages(
+    conn: AsyncSession,
+    worker: str,
+    lease: int,
+    pageids: Optional[Sequence[str]] = None,
+    shard: int = 0,
+    shards: int = 1,
+    limit: int = 500,
+) -> Sequence[str]:
+    """
+    Lease updated pages to a worker so that other workers skip them.
+    Rows locked by another worker's claim are skipped (FOR UPDATE SKIP LOCKED),
+    and pages are partitioned by server id when there are several shards.
+    :param conn: database connection
+    :param worker: id of the worker claiming the pages
+    :param lease: lease duration in seconds
+    :param pageids: only claim these pages, any updated page if None
+    :param shard: shard of this worker (0 <= shard < shards)
+    :param shards: number of shards
+    :param limit: maximum number of pages claimed at once
+    :return: ids of the claimed pages
+    """
+    now = datetime.now()
+    query = (
+        select(NotionPages.page_id)
+        .join(NotionDatabase, NotionPages.database_id == NotionDatabase.database_id)
+        .where(
+            NotionPages.updated,
+            NotionPages.blocked == False,
+            or_(
+                NotionPages.lease_expires.is_(None),
+                NotionPages.lease_expires < now,
+                NotionPages.lease_owner == worker,
+            ),
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=NotionPages)
+    )
+    if pageids is not None:
+        query = query.where(NotionPages.page_id.in_(pageids))
+    if shards > 1:
+        query = query.where(NotionDatabase.server_id % shards == shard)
+    claimed = (await conn.execute(query)).scalars().all()
+    if claimed:
+        stmt = (
+            update(NotionPages)
+            .where(NotionPages.page_id.in_(claimed))
+            .values(lease_owner=worker, lease_expires=now + timedelta(seconds=lease))
+        )
+        await conn.execute(stmt)
+    await conn.commit()
+    return claimed
+
+
+async def release_page_leases(
+    conn: AsyncSession, worker: str, pageids: Sequence[str]
+) -> None:
+    """
+    Give back pages claimed by a worker that it could not deliver, so any
+    worker can claim them again in its next poll.
+    :param conn: database connection
+    :param worker: id of the worker that claimed the pages
+    :param pageids: ids of the pages to release
+    """
+    if not pageids:
+        return
+    stmt = (
+        update(NotionPages)
+        .where(NotionPages.page_id.in_(pageids), NotionPages.lease_owner == worker)
+        .values(lease_owner=None, lease_expires=None)
+    )
+    await conn.execute(stmt)
+    await conn.commit()
+
+
 async def get_all_updated_pages(
     conn: AsyncSession,
+    pageids: Optional[Sequence[str]] = None,
+    unleased: bool = False,
 ) -> Sequence[tuple[NotionPages, str, int, str, list[str]]]:
+    """
+    Get all pages marked as updated.
+    :param conn: database connection
+    :param pageids: only look at these pages (pushed or claimed), all pages if None
+    :param unleased: skip pages whose lease to a worker hasn't expired yet
+    :return: list of (page, database id, channel id, notion token, tags)
+    """
     page_query = (
         select(
             NotionPages,
@@ -203,6 +413,15 @@ async def get_all_updated_pages(
                 NotionDatabase.server_id == ServerInfo.server_id) .where(
                     NotionPages.updated,
             NotionPages.blocked == False))
+    if pageids is not None:
+        page_query = page_query.where(NotionPages.page_id.in_(pageids))
+    if unleased:
+        page_query = page_query.where(
+            or_(
+                NotionPages.lease_expires.is_(None),
+                NotionPages.lease_expires < datetime.now(),
+            )
+        )
     page_results = (await conn.execute(page_query)).all()
 
     server_ids = {row[3] for row in page_results}  # row[3] = server_id
@@ -250,41 +469,198 @@ async def get_threads(conn: AsyncSession, databaseid: str) -> Sequence[int]:
     return result.scalars().all()
 
 
-async def set_pages_updated(
-    conn: AsyncSession, threadids: Sequence[int]
-) -> Optional[Sequence[NotionPages]]:
-    query = select(NotionPages).where(NotionPages.thread_id.in_(threadids))
-    result = await conn.execute(query)
-    notionpages = result.scalars().all()
-    if not notionpages:
-        return None
-    for page in notionpages:
-        page.updated = False
-        notion_page_cache.set(page.page_id, page)
-    await update_notion_page_bulk_fields(conn, threadids, updated=False)
-    query = delete(NotionPages).where(NotionPages.thread_id is None)
-    await conn.execute(query)
+async def ack_pages(
+    conn: AsyncSession, acks: Sequence[tuple[str, int, Optional[str]]]
+) -> Sequence[str]:
+    """
+    Acknowledge pages the bot has delivered, in one conditional UPDATE.
+    The updated flag is only cleared where the version still matches; the
+    content hash is stored for every acked page since it is what Discord shows.
+    :param conn: database connection
+    :param acks: list of (page id, version, content hash)
+    :return: ids of acked pages that were marked as updated again meanwhile
+    """
+    if not acks:
+        return []
+    pageids = [pageid for pageid, _, _ in acks]
+    hashes = {pageid: contenthash for pageid, _, contenthash in acks if contenthash}
+    delivered = tuple_(NotionPages.page_id, NotionPages.version).in_(
+        [(pageid, version) for pageid, version, _ in acks]
+    )
+    values = {
+        "updated": case((delivered, False), else_=NotionPages.updated),
+        # 다시 바뀐 페이지는 같은 워커가 이어서 처리하도록 임대를 유지
+        "lease_owner": case((delivered, None), else_=NotionPages.lease_owner),
+        "lease_expires": case((delivered, None), else_=NotionPages.lease_expires),
+    }
+    if hashes:
+        values["content_hash"] = case(
+            hashes, value=NotionPages.page_id, else_=NotionPages.content_hash
+        )
+    stmt = update(NotionPages).where(NotionPages.page_id.in_(pageids)).values(**values)
+    await conn.execute(stmt)
+    query = select(NotionPages.page_id).where(
+        NotionPages.page_id.in_(pageids), NotionPages.updated
+    )
+    changed = (await conn.execute(query)).scalars().all()
     await conn.commit()
-    return notionpages
+    return changed
 
 
-async def update_notion_page_fields(
-    conn: AsyncSession, page: NotionPages, **kwargs
+async def enqueue_webhook(conn: AsyncSession, serverid: int, body: dict) -> int:
+    """
+    Store a received webhook in the inbox so that it survives restarts.
+    :return: id of the inbox row
+    """
+    item = NotionWebhookInbox(server_id=serverid, body=body)
+    conn.add(item)
+    await conn.commit()
+    return item.id
+
+
+async def claim_webhooks(
+    conn: AsyncSession, limit: int, visibility: int
+) -> Sequence[NotionWebhookInbox]:
+    """
+    Claim due inbox rows for a worker (FOR UPDATE SKIP LOCKED).
+    Claimed rows become visible again after the visibility timeout, so events
+    of a worker that died mid-processing are picked up by another one.
+    :param conn: database connection
+    :param limit: maximum number of rows claimed at once
+    :param visibility: seconds a claimed row stays hidden from other workers
+    :return: claimed rows, attempts already incremented
+    """
+    now = datetime.now()
+    query = (
+        select(NotionWebhookInbox)
+        .where(
+            NotionWebhookInbox.status.in_(("pending", "processing")),
+            NotionWebhookInbox.available_at <= now,
+        )
+        .order_by(NotionWebhookInbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    items = (await conn.execute(query)).scalars().all()
+    if items:
+        stmt = (
+            update(NotionWebhookInbox)
+            .where(NotionWebhookInbox.id.in_([item.id for item in items]))
+            .values(
+                status="processing",
+                attempts=NotionWebhookInbox.attempts + 1,
+                available_at=now + timedelta(seconds=visibility),
+            )
+        )
+        await conn.execute(stmt)
+        for item in items:
+            item.attempts += 1
+    await conn.commit()
+    return items
+
+
+async def complete_webhook(conn: AsyncSession, itemid: int) -> None:
+    await complete_webhooks(conn, [itemid])
+
+
+async def complete_webhooks(conn: AsyncSession, itemids: list[int]) -> None:
+    stmt = (
+        update(NotionWebhookInbox)
+        .where(NotionWebhookInbox.id.in_(itemids))
+        .values(status="done", last_error=None)
+    )
+    await conn.execute(stmt)
+    await conn.commit()
+
+
+async def fail_webhook(
+    conn: AsyncSession,
+    item: NotionWebhookInbox,
+    error: str,
+    maxattempts: int,
+    delay: float,
+) -> bool:
+    """
+    Record a failed attempt. The row is retried after the delay, or moved to
+    the dead letter state once it has used all of its attempts.
+    :return: True if the row is dead
+    """
+    dead = item.attempts >= maxattempts
+    stmt = (
+        update(NotionWebhookInbox)
+        .where(NotionWebhookInbox.id == item.id)
+        .values(
+            status="dead" if dead else "pending",
+            last_error=error[:2000],
+            available_at=datetime.now() + timedelta(seconds=delay),
+        )
+    )
+    await conn.execute(stmt)
+    await conn.commit()
+    return dead
+
+
+async def defer_webhook(
+    conn: AsyncSession, item: NotionWebhookInbox, error: str, delay: float
 ) -> None:
+    """
+    Put a row back without using up an attempt (e.g. the upstream is known to
+    be down), it is retried after the delay.
+    """
     stmt = (
-        update(NotionPages).where(
-            NotionPages.page_id == page.page_id).values(
-            **kwargs))
+        update(NotionWebhookInbox)
+        .where(NotionWebhookInbox.id == item.id)
+        .values(
+            status="pending",
+            attempts=NotionWebhookInbox.attempts - 1,
+            last_error=error[:2000],
+            available_at=datetime.now() + timedelta(seconds=delay),
+        )
+    )
     await conn.execute(stmt)
     await conn.commit()
 
 
-async def update_notion_page_bulk_fields(
-    conn: AsyncSession, threadids: Sequence[int], **kwargs
+async def purge_webhook_inbox(conn: AsyncSession, before: datetime) -> int:
+    """
+    Delete processed inbox rows created before the given time.
+    Dead rows are kept for inspection.
+    """
+    stmt = delete(NotionWebhookInbox).where(
+        NotionWebhookInbox.status == "done", NotionWebhookInbox.created_at < before
+    )
+    result = await conn.execute(stmt)
+    await conn.commit()
+    return result.rowcount
+
+
+async def get_webhook_inbox_stats(conn: AsyncSession) -> dict:
+    """
+    Number of inbox rows per status and the age of the oldest waiting row.
+    """
+    query = select(NotionWebhookInbox.status, func.count()).group_by(
+        NotionWebhookInbox.status
+    )
+    counts = {status: count for status, count in (await conn.execute(query)).all()}
+    query = select(func.min(NotionWebhookInbox.created_at)).where(
+        NotionWebhookInbox.status.in_(("pending", "processing"))
+    )
+    oldest = (await conn.execute(query)).scalar()
+    return {
+        "pending": counts.get("pending", 0),
+        "processing": counts.get("processing", 0),
+        "done": counts.get("done", 0),
+        "dead": counts.get("dead", 0),
+        "oldest_age": (datetime.now() - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+async def update_notion_page_fields(
+    conn: AsyncSession, page: NotionPages, **kwargs
 ) -> None:
     stmt = (
         update(NotionPages).where(
-            NotionPages.thread_id.in_(threadids)).values(
+            NotionPages.page_id == page.page_id).values(
             **kwargs))
     await conn.execute(stmt)
     await conn.commit()
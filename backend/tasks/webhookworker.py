@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from breaker import UpstreamUnavailable
+from common import async_session
+from services import notionservice
+from var import (WEBHOOK_INBOX_RETENTION, WEBHOOK_MAX_ATTEMPTS,
+                 WEBHOOK_POLL_INTERVAL, WEBHOOK_RETRY_DELAY,
+                 WEBHOOK_VISIBILITY_TIMEOUT, WEBHOOK_WORKERS)
+
+# (data, conn, serverid, item) -> True if the row is completed later by
+# complete()/fail() (e.g. once a coalesced delivery is sent)
+WebhookHandler = Callable[[dict, Any, int, Any], Awaitable[bool]]
+
+
+class WebhookWorkerPool:
+    """
+    Workers that process the webhook inbox, each with its own DB session.
+    The listener only stores events, so a slow Notion API or a stopped bot
+    never holds up Notion's delivery and nothing is lost on restart.
+    """
+
+    def __init__(
+        self,
+        workers: int = WEBHOOK_WORKERS,
+        maxattempts: int = WEBHOOK_MAX_ATTEMPTS,
+        interval: float = WEBHOOK_POLL_INTERVAL,
+        batch: int = 10,
+    ):
+        """
+        :param workers: number of worker tasks
+        :param maxattempts: attempts before an event is dead-lettered
+        :param interval: seconds between inbox polls when idle
+        :param batch: rows claimed by a worker at once
+        """
+        self.workers = workers
+        self.maxattempts = maxattempts
+        self.interval = interval
+        self.batch = batch
+        self.handler: Optional[WebhookHandler] = None
+        self.tasks: list[asyncio.Task] = []
+        self.wakeup = asyncio.Event()
+        self.lastpurge = 0.0
+        self.processed = 0
+        self.failed = 0
+        self.dead = 0
+        self.deferred = 0
+        self.held = 0
+
+    async def start(self, handler: WebhookHandler) -> None:
+        """
+        :param handler: async callback(data, conn, serverid, item) for one event
+        """
+        self.handler = handler
+        self.tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        logging.info(f"Webhook worker pool started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def notify(self) -> None:
+        """
+        Wake idle workers up, called after an event is stored.
+        """
+        self.wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                async with async_session() as conn:
+                    items = await notionservice.claim_webhooks(
+                        conn, self.batch, WEBHOOK_VISIBILITY_TIMEOUT
+                    )
+            except Exception as e:
+                logging.error(f"Failed to claim webhook events: {e}")
+                items = []
+            if not items:
+                await self._idle()
+                continue
+            for item in items:
+                await self._process(item)
+
+    async def _idle(self) -> None:
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), self.interval)
+        except asyncio.TimeoutError:
+            pass
+        if time.monotonic() - self.lastpurge > 3600:
+            self.lastpurge = time.monotonic()
+            before = datetime.now() - timedelta(seconds=WEBHOOK_INBOX_RETENTION)
+            try:
+                async with async_session() as conn:
+                    await notionservice.purge_webhook_inbox(conn, before)
+            except Exception as e:
+                logging.error(f"Failed to purge webhook inbox: {e}")
+
+    async def _process(self, item) -> None:
+        async with async_session() as conn:
+            try:
+                if await self.handler(item.body, conn, item.server_id, item):
+                    # 합쳐서 보내는 이벤트는 전송된 뒤에 complete/fail 로 처리
+                    self.held += 1
+                    return
+                await notionservice.complete_webhook(conn, item.id)
+                self.processed += 1
+                return
+            except Exception as e:
+                await conn.rollback()
+                error = e
+            await self._fail(conn, item, error)
+
+    async def complete(self, items: list) -> None:
+        """
+        Complete rows held by the handler, once their delivery has succeeded.
+        """
+        if not items:
+            return
+        self.held -= len(items)
+        try:
+            async with async_session() as conn:
+                itemids = [item.id for item in items]
+                await notionservice.complete_webhooks(conn, itemids)
+        except Exception as e:
+            # 완료 기록을 못 하면 visibility timeout 후 다시 전송됨
+            logging.error(f"Failed to complete {len(items)} webhook events: {e}")
+            return
+        self.processed += len(items)
+
+    async def fail(self, items: list, error: Exception) -> None:
+        """
+        Fail rows held by the handler whose delivery failed, they are retried.
+        """
+        if not items:
+            return
+        self.held -= len(items)
+        async with async_session() as conn:
+            for item in items:
+                await self._fail(conn, item, error)
+
+    async def _fail(self, conn, item, error: Exception) -> None:
+        if isinstance(error, UpstreamUnavailable):
+            # 업스트림이 차단된 동안은 시도 횟수를 쓰지 않고 풀린 뒤 다시 처리
+            self.deferred += 1
+            try:
+                await notionservice.defer_webhook(
+                    conn, item, str(error), error.retry_after
+                )
+            except Exception as e:
+                logging.error(f"Failed to defer webhook event {item.id}: {e}")
+            return
+        self.failed += 1
+        error = f"{type(error).__name__}: {error}"
+        delay = WEBHOOK_RETRY_DELAY * 2 ** (item.attempts - 1)
+        try:
+            dead = await notionservice.fail_webhook(
+                conn, item, error, self.maxattempts, delay
+            )
+        except Exception as e:
+            # 실패 기록도 못 하면 visibility timeout 후 다시 처리됨
+            logging.error(f"Failed to record webhook failure {item.id}: {e}")
+            return
+        if dead:
+            self.dead += 1
+            logging.error(f"Webhook event {item.id} dead-lettered: {error}")
+        else:
+            logging.warning(
+                f"Webhook event {item.id} failed (attempt {item.attempts}): {error}"
+            )
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self.tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "dead": self.dead,
+            "deferred": self.deferred,
+            "held": self.held,
+        }
+
+
+webhook_worker_pool = WebhookWorkerPool()
@@ -20,8 +20,92 @@ REDIRECT_URI = os.environ["REDIRECT_URI"]
 
 dbuser = os.environ["MYSQL_USER"]
 dbpassword = os.environ["MYSQL_PASSWORD"]
-dbhost = "notipy-database"
+dbhost = os.environ.get("MYSQL_HOST", "notipy-database")
 dbport = os.environ["MYSQL_TCP_PORT"]
 dbname = os.environ["MYSQL_DATABASE"]
 
-discordbot = "http://notipy-discordbot:9090"
+discordbot = os.environ.get("DISCORD_BOT_URL", "http://notipy-discordbot:9090")
+
+# Notion fetch concurrency (poll cycle)
+NOTION_FETCH_CONCURRENCY = int(os.environ.get("NOTION_FETCH_CONCURRENCY", 10))
+NOTION_TOKEN_CONCURRENCY = int(os.environ.get("NOTION_TOKEN_CONCURRENCY", 3))
+
+# Notion API rate limit (per integration token)
+NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", 3))  # requests/s
+NOTION_RATE_BURST = float(os.environ.get("NOTION_RATE_BURST", 3))
+NOTION_MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES", 3))
+
+# Seconds to wait (per page debounce) before pushing page updates to the bot
+NOTION_PUSH_DEBOUNCE = float(os.environ.get("NOTION_PUSH_DEBOUNCE", 5))
+
+# How the poll discovers changed pages: "webhook" (pages marked by webhooks only)
+# or "query" (also query every linked database by last_edited_time)
+NOTION_SYNC_MODE = os.environ.get("NOTION_SYNC_MODE", "webhook")
+
+# Durable webhook inbox: worker pool that processes stored webhook events
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", 4))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 5))
+WEBHOOK_POLL_INTERVAL = float(os.environ.get("WEBHOOK_POLL_INTERVAL", 2))  # seconds
+WEBHOOK_RETRY_DELAY = float(os.environ.get("WEBHOOK_RETRY_DELAY", 10))  # doubled per attempt
+WEBHOOK_VISIBILITY_TIMEOUT = int(os.environ.get("WEBHOOK_VISIBILITY_TIMEOUT", 300))
+WEBHOOK_INBOX_RETENTION = int(os.environ.get("WEBHOOK_INBOX_RETENTION", 86400))  # seconds
+
+# Quiet period that merges bursts of the same webhook event (server, entity, type)
+WEBHOOK_COALESCE_WINDOW = float(os.environ.get("WEBHOOK_COALESCE_WINDOW", 10))
+WEBHOOK_COALESCE_MAXWAIT = float(os.environ.get("WEBHOOK_COALESCE_MAXWAIT", 60))
+
+# Seconds after which the webhook routing table is reloaded from the database
+WEBHOOK_ROUTES_REFRESH = float(os.environ.get("WEBHOOK_ROUTES_REFRESH", 300))
+
+# Notion user directory (webhook authors), loaded per token from the /users list
+NOTION_USER_REFRESH = float(os.environ.get("NOTION_USER_REFRESH", 3600))  # seconds
+NOTION_USER_NEGATIVE_TTL = float(os.environ.get("NOTION_USER_NEGATIVE_TTL", 600))
+NOTION_USER_WORKSPACES = int(os.environ.get("NOTION_USER_WORKSPACES", 1000))
+
+# Enrich webhook events from the page title cache (URL built from the page id)
+# and only GET the page on a cache miss
+WEBHOOK_LAZY_ENRICHMENT = (
+    os.environ.get("WEBHOOK_LAZY_ENRICHMENT", "true").lower() == "true"
+)
+
+# Seconds Notion comments are collected before being sent to the page's thread
+COMMENT_FLUSH_INTERVAL = float(os.environ.get("COMMENT_FLUSH_INTERVAL", 10))
+
+# Shared HTTP client pool for outbound requests (Notion, Discord, GitHub, bot)
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", 30))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", 300))  # seconds
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))  # total per request
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+
+# Per-upstream circuit breaker and retries of idempotent requests
+UPSTREAM_FAILURE_THRESHOLD = int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", 5))
+UPSTREAM_RECOVERY_TIMEOUT = float(os.environ.get("UPSTREAM_RECOVERY_TIMEOUT", 30))
+UPSTREAM_HALF_OPEN_PROBES = int(os.environ.get("UPSTREAM_HALF_OPEN_PROBES", 1))
+UPSTREAM_MAX_RETRIES = int(os.environ.get("UPSTREAM_MAX_RETRIES", 2))
+UPSTREAM_RETRY_BASE = float(os.environ.get("UPSTREAM_RETRY_BASE", 0.5))  # seconds
+UPSTREAM_RETRY_MAX = float(os.environ.get("UPSTREAM_RETRY_MAX", 5))
+
+# GitHub REST responses kept with their ETag/Last-Modified for conditional requests
+GITHUB_CACHE_SIZE = int(os.environ.get("GITHUB_CACHE_SIZE", 1000))
+GITHUB_CACHE_DIR = os.environ.get("GITHUB_CACHE_DIR", "")  # 비어 있으면 메모리에만 보관
+
+# Cache namespaces: name -> (maxsize, ttl seconds),
+# each one can be overridden with CACHE_<NAME>_SIZE and CACHE_<NAME>_TTL
+CACHE_DEFAULTS = {
+    "notion_page": (100, 12 * 60 * 60),
+    "discord_server": (100, 3 * 60 * 60),
+    "notion_database": (100, 12 * 60 * 60),
+    "notion_database_meta": (1000, 60 * 60),
+    "notion_schema": (1000, 12 * 60 * 60),
+    "notion_page_title": (10000, 24 * 60 * 60),
+    "notion_page_object": (100, 60 * 60),
+}
+CACHE_NAMESPACES = {
+    name: (
+        int(os.environ.get(f"CACHE_{name.upper()}_SIZE", maxsize)),
+        float(os.environ.get(f"CACHE_{name.upper()}_TTL", ttl)),
+    )
+    for name, (maxsize, ttl) in CACHE_DEFAULTS.items()
+}
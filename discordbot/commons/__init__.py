@@ -1,17 +1,22 @@
+import asyncio
 import inspect
 import random
 from http.client import responses
+from json import loads
 from os.path import abspath, dirname
-from typing import Any, Awaitable, Callable, Coroutine, Optional, Tuple
+from typing import (Any, AsyncIterator, Awaitable, Callable, Coroutine,
+                    Optional, Tuple)
 
 import aiohttp
-from cachetools import TTLCache
 from interactions import (ActionRow, BaseComponent, BaseContext,
                           ChannelSelectMenu, Client, Message, RoleSelectMenu,
                           StringSelectMenu)
 from interactions.api.events import Component
 
-from .cache import BiDirectionalTTLCache
+from .cache import (BiDirectionalTTLCache, InstrumentedTTLCache, SingleFlight,
+                    cache_stats)
+from .deadline import (DEADLINE_HEADER, bind_interaction, interaction_deadline,
+                       remaining_budget)
 from .locale import *
 from .Options import *
 from .var import *
@@ -30,29 +35,29 @@ async def is_dev(ctx) -> bool:
     return int(ctx.author.id) in developers
 
 
-modcache = TTLCache(maxsize=100, ttl=60 * 60 * 24)  # 1일 캐시
+# 서버별 관리자 역할 ID (0: 없음), 다른 봇 인스턴스에서 바꾼 값도 10분 안에 반영됨
+modcache = InstrumentedTTLCache(maxsize=1000, ttl=60 * 10, name="modcache")
 
 
 async def is_moderator(ctx: BaseContext) -> bool:
     if ctx.guild is None:
         return False
+    bind_interaction(ctx)  # 체크는 localize 보다 먼저 실행됨
     guild = ctx.guild
     member = await guild.fetch_member(ctx.author.id)
     if member.guild_permissions.ADMINISTRATOR:
         return True
     member_role_ids = [int(role.id) for role in member.roles]
-    # TODO: use cache, 나중에 cachetools로 캐시 구현 예정
-    # cached_modrole_id = modcache.get(guild.id)
-    # if cached_modrole_id is not None:
-    #     return cached_modrole_id in member_role_ids
-    status, response = await apirequest(f"/discord/{guild.id}/modrole")
-    if status != 200:
-        return False
-    modrole = response.get("modrole")
-    if modrole is None:
-        return False
-    modrole_id = int(modrole)
-    modcache[guild.id] = modrole_id
+    modrole_id = modcache.get(int(guild.id))
+    if modrole_id is None:
+        status, response = await apirequest(
+            f"/discord/{guild.id}/modrole", singleflight=True, ttl=5
+        )
+        if status != 200:
+            return False
+        modrole = response.get("modrole")
+        modrole_id = int(modrole) if modrole is not None else 0
+        modcache[int(guild.id)] = modrole_id
     return modrole_id in member_role_ids
 
 
@@ -139,6 +144,40 @@ class MyFunctions:
             return None
 
 
+# importlib.reload(commons) 후에도 열려 있는 세션을 그대로 사용
+api_session: Optional[aiohttp.ClientSession] = globals().get("api_session")
+
+
+def get_api_session() -> aiohttp.ClientSession:
+    """
+    Long-lived pooled session for backend API calls, over a Unix socket when
+    BACKEND_UNIX_SOCKET is set. Closed with the bot's FastAPI lifespan.
+    """
+    global api_session
+    if api_session is None or api_session.closed:
+        if backend_unix_socket:
+            connector = aiohttp.UnixConnector(
+                path=backend_unix_socket, limit=api_pool_limit
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=api_pool_limit, ttl_dns_cache=300, keepalive_timeout=30
+            )
+        timeout = aiohttp.ClientTimeout(total=api_timeout, connect=api_connect_timeout)
+        api_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return api_session
+
+
+async def close_api_session() -> None:
+    global api_session
+    if api_session is not None:
+        await api_session.close()
+        api_session = None
+
+
+api_singleflight = SingleFlight()
+
+
 async def apirequest(
     endpoint: str,
     method: str = "GET",
@@ -147,9 +186,33 @@ async def apirequest(
     json: any = None,
     headers: dict = None,
     auth: aiohttp.BasicAuth = None,
+    singleflight: bool = False,
+    ttl: float = 0,
+    timeout: Optional[float] = None,
 ) -> tuple[int, dict | None]:
+    """
+    :param singleflight: (GET only) concurrent identical requests share one
+                         backend call, the response must not be mutated
+    :param ttl: with singleflight, seconds to keep a 200 response
+    :param timeout: total seconds for this call, for slow endpoints
+                    (default BACKEND_TIMEOUT)
+    """
+    if singleflight and method == "GET":
+        key = (endpoint, tuple(sorted(params.items())) if params else None)
+        return await api_singleflight.do(
+            key,
+            lambda: makerequest(
+                api_root + endpoint, method, params, data, json, headers, auth, timeout
+            ),
+            ttl,
+            cacheable=lambda result: result[0] == 200,
+        )
+    if method != "GET":
+        # 같은 엔드포인트에 쓰면 보관 중인 GET 결과는 버림
+        path = endpoint.lstrip("/")
+        api_singleflight.forget(lambda key: key[0].lstrip("/") == path)
     return await makerequest(
-        api_root + endpoint, method, params, data, json, headers, auth
+        api_root + endpoint, method, params, data, json, headers, auth, timeout
     )
 
 
@@ -161,6 +224,7 @@ async def makerequest(
     json: any = None,
     headers: dict = None,
     auth: aiohttp.BasicAuth = None,
+    timeout: Optional[float] = None,
 ) -> tuple[int, dict | None]:
     # add default_header to headers
     if headers is None:
@@ -169,7 +233,26 @@ async def makerequest(
         "true"  # this is a custom header to identify internal requests
     )
     headers["Content-Type"] = "application/json"
-    async with aiohttp.ClientSession() as session:
+    # 백엔드 전용 세션 (BACKEND_UNIX_SOCKET 이 설정되면 url의 호스트와 무관하게 소켓으로 감)
+    session = get_api_session()
+    total = api_timeout if timeout is None else timeout
+    clienttimeout = session.timeout
+    if timeout is not None:
+        clienttimeout = aiohttp.ClientTimeout(total=total, connect=api_connect_timeout)
+    clamped = False
+    deadline = interaction_deadline()
+    if deadline is not None:
+        remaining = remaining_budget()
+        if remaining <= 0:
+            # 이미 응답할 수 없는 인터랙션이므로 백엔드에 보내지 않음
+            return 504, None
+        headers[DEADLINE_HEADER] = f"{deadline:.3f}"
+        if remaining < total:
+            clamped = True
+            clienttimeout = aiohttp.ClientTimeout(
+                total=remaining, connect=min(remaining, api_connect_timeout)
+            )
+    try:
         async with session.request(
             method,
             url,
@@ -178,6 +261,7 @@ async def makerequest(
             json=json,
             headers=headers,
             auth=auth,
+            timeout=clienttimeout,
         ) as response:
             status = response.status
             json_res = None
@@ -186,6 +270,41 @@ async def makerequest(
             except aiohttp.ContentTypeError:
                 json_res = None
             return status, json_res
+    except asyncio.TimeoutError:
+        if not clamped:
+            raise
+        return 504, None
+
+
+async def apistream(
+    endpoint: str,
+    method: str = "GET",
+    params: dict | list[tuple[str, Any]] = None,
+    headers: dict = None,
+) -> AsyncIterator[dict]:
+    """
+    Request a newline-delimited JSON endpoint and yield each item as it arrives.
+    Yields nothing on 204, raises ValueError on any other non-200 status.
+    """
+    if headers is None:
+        headers = {}
+    headers["X-Internal-Request"] = "true"
+    # 스트림은 전체 시간 제한 없이, 줄 사이 대기 시간만 제한
+    timeout = aiohttp.ClientTimeout(
+        total=None, connect=api_connect_timeout, sock_read=api_stream_timeout
+    )
+    session = get_api_session()
+    async with session.request(
+        method, api_root + endpoint, params=params, headers=headers, timeout=timeout
+    ) as response:
+        if response.status == 204:
+            return
+        if response.status != 200:
+            raise ValueError(f"Error in {endpoint}: {response.status}")
+        async for line in response.content:
+            line = line.strip()
+            if line:
+                yield loads(line)
 
 
 def createRandomColor():
@@ -1,11 +1,66 @@
-from time import time
+import asyncio
+import contextvars
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Hashable
 
 from cachetools import TTLCache
 
 
-class BiDirectionalTTLCache(TTLCache):
-    def __init__(self, maxsize: int, ttl: int, timer=time):
+# 이름이 있는 캐시들, cache_stats 로 통계를 보고
+named_caches: dict[str, "InstrumentedTTLCache"] = {}
+
+
+class InstrumentedTTLCache(TTLCache):
+    """
+    TTLCache with hit/miss (get), eviction and expiry counters.
+    Caches created with a name are listed by cache_stats.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, timer=time, name: str = None):
         super().__init__(maxsize=maxsize, ttl=ttl, timer=timer)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name is not None:
+            named_caches[name] = self  # 익스텐션을 다시 불러오면 새 캐시로 교체
+
+    def get(self, key, default=None):
+        if key in self:
+            self.hits += 1
+            return self[key]
+        self.misses += 1
+        return default
+
+    def popitem(self):
+        # cachetools는 자리가 부족할 때만 popitem을 호출 (만료된 항목은 먼저 정리됨)
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+    def stats(self) -> dict:
+        self.expire()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class BiDirectionalTTLCache(InstrumentedTTLCache):
+    def __init__(self, maxsize: int, ttl: int, timer=time, name: str = None):
+        super().__init__(maxsize=maxsize, ttl=ttl, timer=timer, name=name)
         self._inverse = {}
 
     def __setitem__(self, key: int, value: int):
@@ -29,10 +84,118 @@ class BiDirectionalTTLCache(TTLCache):
 
     def get_by_value(self, value: int) -> int | None:
         self.expire()
-        return self._inverse.get(value)
+        key = self._inverse.get(value)
+        if key is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key
+
+    def expire(self, time=None):
+        # TTLCache.expire 는 __delitem__ 을 거치지 않으므로 역방향도 직접 정리
+        expired = super().expire(time)
+        for _, value in expired:
+            self._inverse.pop(value, None)
+        return expired
 
     def popitem(self):
         # 캐시 만료 관리
         key, value = super().popitem()
         self._inverse.pop(value, None)
         return key, value
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight call, and the
+    result can be kept for a short TTL.
+    The call runs in its own task without the caller's context variables, so
+    cancelling one caller or its interaction deadline doesn't affect the others.
+    Shared results are the same object for every caller, don't mutate them.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self.inflight: dict[Hashable, asyncio.Task] = {}
+        self.results: dict[Hashable, tuple[float, Any]] = {}  # key -> (만료 시각, 결과)
+        self.calls = 0
+        self.shared = 0
+        self.hits = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        ttl: float = 0,
+        cacheable: Callable[[Any], bool] = lambda result: True,
+    ) -> Any:
+        """
+        :param key: identifies identical calls
+        :param func: the call, made once per key at a time
+        :param ttl: seconds to keep the result, 0 to only share in-flight calls
+        :param cacheable: whether a result may be kept (e.g. only successes)
+        """
+        cached = self.results.get(key)
+        if cached is not None:
+            if cached[0] > monotonic():
+                self.hits += 1
+                return cached[1]
+            del self.results[key]
+        task = self.inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            # 먼저 호출한 쪽이 취소되거나 인터랙션 마감에 걸려도 공유하는 호출은
+            # 끝까지 가도록, 새 컨텍스트의 태스크에서 실행
+            task = asyncio.create_task(
+                self._run(key, func, ttl, cacheable), context=contextvars.Context()
+            )
+            # 기다리는 쪽이 모두 취소되어도 예외 경고가 나지 않도록
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        ttl: float,
+        cacheable: Callable[[Any], bool],
+    ) -> Any:
+        try:
+            result = await func()
+        finally:
+            del self.inflight[key]
+        if ttl > 0 and cacheable(result):
+            if len(self.results) >= self.maxsize:
+                self.expire()
+            if len(self.results) < self.maxsize:
+                self.results[key] = (monotonic() + ttl, result)
+        return result
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Drop kept results whose key matches (e.g. after a write).
+        """
+        for key in [key for key in self.results if match(key)]:
+            del self.results[key]
+
+    def expire(self) -> None:
+        now = monotonic()
+        expired = [key for key, (expires, _) in self.results.items() if expires <= now]
+        for key in expired:
+            del self.results[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "hits": self.hits,
+            "inflight": len(self.inflight),
+            "kept": len(self.results),
+        }
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in named_caches.items()}
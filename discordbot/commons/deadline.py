@@ -0,0 +1,45 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from interactions import BaseContext
+
+from .var import interaction_budget, interaction_margin
+
+DISCORD_EPOCH = 1420070400000  # ms
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# 지금 처리 중인 인터랙션 (localize, is_moderator 에서 설정)
+current_interaction: ContextVar[Optional[BaseContext]] = ContextVar(
+    "current_interaction", default=None
+)
+
+
+def bind_interaction(ctx: BaseContext) -> None:
+    """
+    Make the interaction the one backend requests of this task are made for.
+    """
+    current_interaction.set(ctx)
+
+
+def interaction_deadline() -> Optional[float]:
+    """
+    Unix time by which the backend has to answer for the current interaction.
+    None if there is no interaction, or it was already deferred or answered
+    (the 3 second limit no longer applies then).
+    """
+    ctx = current_interaction.get()
+    if ctx is None:
+        return None
+    if getattr(ctx, "deferred", False) or getattr(ctx, "responded", False):
+        return None
+    # 인터랙션 id(snowflake)에 생성 시각이 들어 있음
+    created = ((int(ctx.id) >> 22) + DISCORD_EPOCH) / 1000
+    return created + interaction_budget - interaction_margin
+
+
+def remaining_budget() -> Optional[float]:
+    deadline = interaction_deadline()
+    if deadline is None:
+        return None
+    return deadline - time.time()
@@ -7,6 +7,7 @@ from typing import Callable, Union
 from interactions import (ComponentContext, LocalisedDesc, LocalisedName,
                           SlashContext)
 
+from .deadline import bind_interaction
 from .localization import language_codes
 
 locales = {}
@@ -33,6 +34,7 @@ def localize(server_only: bool = True):
         async def wrapped_func(
             self, ctx: Union[SlashContext, ComponentContext], *args, **kwargs
         ):
+            bind_interaction(ctx)  # 백엔드 요청에 인터랙션의 남은 시간을 실어 보냄
             if server_only and not ctx.guild:
                 _ = localizator(ctx.locale)
                 await ctx.send(_("server_only_error"), ephemeral=True)
@@ -1,4 +1,5 @@
 import os
+import socket
 
 token = os.environ["DISCORD_TOKEN"]
 notion_api_url = os.environ["NOTION_API_URL"]  # Notion API URL
@@ -27,4 +28,31 @@ backend_api_root = os.environ["BACKEND_APP_ROOT"]
 
 api_root = f"{backend_url}:{apiport}{backend_api_root}"  # Backend API root URL
 
+# Backend API client: pooled keep-alive session, optionally over a Unix socket
+# when the bot and the backend share a host (the backend must listen on it too)
+backend_unix_socket = os.environ.get("BACKEND_UNIX_SOCKET") or None
+api_pool_limit = int(os.environ.get("BACKEND_POOL_LIMIT", 20))
+api_timeout = float(os.environ.get("BACKEND_TIMEOUT", 10))  # seconds
+api_connect_timeout = float(os.environ.get("BACKEND_CONNECT_TIMEOUT", 2))
+# LLM 분석(POST /llm/git)은 수십 초 이상 걸릴 수 있어서 따로 둠 (디퍼된 인터랙션은 15분)
+api_llm_timeout = float(os.environ.get("BACKEND_LLM_TIMEOUT", 600))
+# 스트리밍 응답(업데이트된 페이지 목록)의 줄 사이 최대 대기 시간
+api_stream_timeout = float(os.environ.get("BACKEND_STREAM_TIMEOUT", 120))
+
+# Discord drops an interaction that isn't answered or deferred within 3 seconds,
+# backend requests made for it carry the deadline (minus the time to answer)
+interaction_budget = float(os.environ.get("INTERACTION_BUDGET", 3))
+interaction_margin = float(os.environ.get("INTERACTION_MARGIN", 0.5))
+
 githuburl = "https://github.com"
+
+# Page update workers: each bot instance leases the pages it posts, so
+# several instances can run without posting the same page twice
+notion_worker_id = os.environ.get("NOTION_WORKER_ID", socket.gethostname())
+notion_worker_shard = int(os.environ.get("NOTION_WORKER_SHARD", 0))
+notion_worker_shards = int(os.environ.get("NOTION_WORKER_SHARDS", 1))
+notion_lease_seconds = int(os.environ.get("NOTION_LEASE_SECONDS", 300))
+# 한 번에 점유하는 최대 페이지 수, 가득 차면 남은 페이지를 이어서 점유함
+notion_claim_limit = int(os.environ.get("NOTION_CLAIM_LIMIT", 500))
+# 푸시가 유실된 경우를 위한 주기적 폴링 간격 (분)
+notion_poll_minutes = float(os.environ.get("NOTION_POLL_MINUTES", 5))
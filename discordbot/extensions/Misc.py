@@ -5,8 +5,12 @@ from commons import *
 from interactions import *
 from interactions.api.events import GuildJoin, GuildLeft, MessageCreate
 
-dmCache = BiDirectionalTTLCache(maxsize=100, ttl=60 * 60 * 24)  # 1 day cache
-blockedUser = TTLCache(maxsize=100, ttl=60 * 60 * 24)
+dmCache = BiDirectionalTTLCache(
+    maxsize=100, ttl=60 * 60 * 24, name="dm_threads"
+)  # 1 day cache
+blockedUser = InstrumentedTTLCache(
+    maxsize=100, ttl=60 * 60 * 24, name="blocked_users"
+)
 # {user_id: forum_thread_id}
 
 settingsBase = SlashCommand(name=getname("settings"))
@@ -316,6 +320,7 @@ class Misc(Extension):
         )
         if status != 200:
             raise ValueError(f"Error in /discord/{guildid}/modrole")
+        modcache.pop(guildid, None)  # is_moderator 가 새 역할을 바로 보도록
         await ctx.send(_("set_modrole_success"), ephemeral=True)
 
     @settingsBase.subcommand(sub_cmd_name=getname("view"),
@@ -34,7 +34,10 @@ def getNotionToken():
 
             guildid = ctx.guild_id
             status, response = await apirequest(
-                f"/discord/{guildid}/notion/token", method="GET"
+                f"/discord/{guildid}/notion/token",
+                method="GET",
+                singleflight=True,
+                ttl=5,
             )
 
             if status != 200 or "token" not in response:
@@ -73,13 +76,26 @@ async def getNotionDatabases(notion_token: str) -> Optional[list[dict]]:
 
 class Notion(Extension):
     bot: Client = None
+    functions: MyFunctions = None
     regex_pattern = re.compile(r"togglepageblock_([a-f0-9\-]{32,36})")
 
-    def __init__(self, bot):
+    def __init__(self, bot, functions: MyFunctions):
         self.bot = bot
+        self.functions = functions
+        self.sync_lock = asyncio.Lock()
+        self.functions.set("notionpageupdated", self.notion_page_updated)
+        self.functions.set("notioncomments", self.notion_comments)
         self.update_notion_page.start()
         asyncio.create_task(self.async_init())
 
+    def drop(self) -> None:
+        """
+        Drop the extension.
+        """
+        self.functions.remove("notionpageupdated")
+        self.functions.remove("notioncomments")
+        super().drop()
+
     async def async_init(self):
         """
         Async init function.
@@ -424,53 +440,167 @@ class Notion(Extension):
             raise ValueError("Error in /notion/removenotiontag")
         await usedctx.edit_origin(content=_("notion_tag_removed"), components=[])
 
-    @Task.create(IntervalTrigger(minutes=5))
+    @Task.create(IntervalTrigger(minutes=notion_poll_minutes))
     async def update_notion_page(self):
         """
         Update the Notion page.
+        Updates are pushed by the backend (notionpageupdated), this interval
+        poll is only a safety net for pushes that were lost.
         """
-        status, res = await apirequest("/notion/notionpage/updated", method="GET")
-        if status == 204:
-            return
-        if status != 200:
-            raise ValueError("Error in /notion/updated")
-        if res["data"] is None:
+        await self.sync_notion_pages()
+
+    async def notion_page_updated(self, bot: Client, params: dict) -> dict:
+        """
+        Called by the backend when pages were marked as updated.
+        """
+        asyncio.create_task(self.sync_notion_pages(params["pageids"]))
+        return {"status": "scheduled"}
+
+    async def notion_comments(self, bot: Client, batches: list[dict]) -> dict:
+        """
+        Called by the backend with the Notion comments of the last flush interval.
+        Each batch goes to the thread of its page as one message (10 embeds max).
+        :return: {"failed": indexes of the batches that couldn't be sent}
+        """
+        failed = []
+        for index, batch in enumerate(batches):
+            try:
+                await self.send_comments(batch)
+            except Exception as e:
+                self.bot.logger.warning(
+                    "Error sending comments of %s: %s", batch["pageid"], e
+                )
+                failed.append(index)
+        return {"failed": failed}
+
+    async def send_comments(self, batch: dict) -> None:
+        thread = await self.bot.fetch_channel(batch["threadid"])
+        if thread is None:
             return
-        success = []
-        for result in res["data"]:
-            status = result["status"]
-            if not status:
-                continue
-            channelid = result["channelid"]
-            channel = await self.bot.fetch_channel(channelid)
-            if not channel:
-                return  # TODO: delete subscription
-            embed = Embed(title=result["pagetitle"], color=createRandomColor())
-            embed.url = result["pageurl"]
-            embed.set_footer(
-                text="Updated: "
-                + datetime.now(timezone.utc).strftime("%B %d, %Y, %I:%M %p")
+        locale = thread.guild.preferred_locale
+        embeds = []
+        for comment in batch["comments"]:
+            embed = Embed(
+                description=comment["text"][:4096],
+                color=0x2980B9,
+                timestamp=comment["created_time"],
+            )
+            embed.set_author(
+                name=str(comment["author"]), icon_url=comment["avatar_url"]
             )
-            for key, value in result["props"].items():
-                if key == "title":
+            if comment["edited"]:
+                embed.set_footer(text=getlocale("comment.updated", locale))
+            embeds.append(embed)
+        for i in range(0, len(embeds), 10):
+            await thread.send(embeds=embeds[i:i + 10])
+
+    async def sync_notion_pages(self, pageids: Optional[list[str]] = None):
+        """
+        Post the updated pages to Discord.
+        Pages edited again while they were being posted are re-posted in the
+        same cycle (a few rounds at most). When every updated page is polled,
+        claiming goes on while full claims (NOTION_CLAIM_LIMIT) come back.
+        :param pageids: only these pages, every updated page if None
+        """
+        async with self.sync_lock:  # 푸시와 주기적 폴링이 겹치지 않도록
+            requested = pageids
+            rounds = 0
+            while True:
+                received, acked, changed = await self.sync_notion_pages_once(pageids)
+                if requested is None and received >= notion_claim_limit and acked:
+                    # 밀린 페이지가 더 있음 (다시 바뀐 페이지도 다음 점유에 포함됨)
+                    pageids = None
                     continue
-                if isinstance(value, list):
-                    value = ", ".join(value)
-                if value is None or value.strip() == "":
-                    value = getlocale(
-                        "not_set", channel.guild.preferred_locale)
-                embed.add_field(name=key, value=value, inline=False)
-            try:
-                if isinstance(channel, GuildForum):
-                    res = await self.send_to_forum(channel, result, embed)
-                else:
-                    res = await self.send_to_channel(channel, result, embed)
-                if res:
-                    success.append(res)
-            except Exception as e:
-                self.bot.logger.warning("Error in Notion webhook: %s", e)
-        if success:
-            await apirequest("/notion/notionpage/updated", method="POST", json=success)
+                if not changed or rounds >= 3:
+                    break
+                rounds += 1
+                pageids = changed
+
+    async def sync_notion_pages_once(
+        self, pageids: Optional[list[str]] = None
+    ) -> tuple[int, int, list[str]]:
+        """
+        Stream the updated pages from the backend and post each one as soon as
+        it arrives, then acknowledge them with the version that was posted.
+        :return: (pages received, pages acked, ids of pages that changed again
+                 after they were fetched)
+        """
+        params = [
+            ("stream", 1),
+            ("worker", notion_worker_id),
+            ("lease", notion_lease_seconds),
+            ("shard", notion_worker_shard),
+            ("shards", notion_worker_shards),
+            ("limit", notion_claim_limit),
+        ]
+        if pageids is not None:
+            params += [("pageids", pageid) for pageid in pageids]
+        success = []
+        received = sent = skipped = 0
+        async for result in apistream("/notion/notionpage/updated", params=params):
+            received += 1
+            if result.get("unchanged"):
+                # 보이는 내용이 같으면 디스코드 API 호출 없이 ack만 함
+                threadid = result["threadid"]
+                skipped += 1
+            else:
+                threadid = await self.post_notion_page(result)
+                if threadid:
+                    sent += 1
+            if threadid:
+                success.append(
+                    {
+                        "pageid": result["pageid"],
+                        "version": result["version"],
+                        "hash": result.get("hash"),
+                    }
+                )
+        if sent or skipped:
+            self.bot.logger.info(
+                f"Notion page sync: {sent} sent, {skipped} skipped (unchanged)"
+            )
+        if not success:
+            return received, 0, []
+        status, response = await apirequest(
+            "/notion/notionpage/updated", method="POST", json=success
+        )
+        if status != 200:
+            return received, 0, []
+        return received, len(success), response["data"]["changed"]
+
+    async def post_notion_page(self, result: dict) -> Optional[int]:
+        """
+        Post or edit a single updated Notion page.
+        :return: id of the thread (or message) that was updated
+        """
+        if not result["status"]:
+            return None
+        channelid = result["channelid"]
+        channel = await self.bot.fetch_channel(channelid)
+        if not channel:
+            return None  # TODO: delete subscription
+        embed = Embed(title=result["pagetitle"], color=createRandomColor())
+        embed.url = result["pageurl"]
+        embed.set_footer(
+            text="Updated: "
+            + datetime.now(timezone.utc).strftime("%B %d, %Y, %I:%M %p")
+        )
+        for key, value in result["props"].items():
+            if key == "title":
+                continue
+            if isinstance(value, list):
+                value = ", ".join(str(item) for item in value)
+            if value is None or str(value).strip() == "":
+                value = getlocale("not_set", channel.guild.preferred_locale)
+            value = str(value)  # number, checkbox, formula 값은 문자열이 아님
+            embed.add_field(name=key, value=value, inline=False)
+        try:
+            if isinstance(channel, GuildForum):
+                return await self.send_to_forum(channel, result, embed)
+            return await self.send_to_channel(channel, result, embed)
+        except Exception as e:
+            self.bot.logger.warning("Error in Notion webhook: %s", e)
+        return None
 
     async def send_to_forum(
             self,
@@ -523,7 +653,7 @@ class Notion(Extension):
         if message:
             message = await channel.fetch_message(messageid)
             await message.edit(embed=embed)
-            return None
+            return messageid
         message = await channel.send(embed=embed)
         channel = await message.create_thread(name=pagedata["pagetitle"])
         await apirequest(
@@ -553,7 +683,7 @@ class Notion(Extension):
 
 
 def setup(bot, functions):
-    Notion(bot)
+    Notion(bot, functions)
 
 
 def teardown():
@@ -120,7 +120,10 @@ class User(Extension):
     async def llm_github_analyze_callback(self, ctx: ComponentContext, _):
         await ctx.defer(edit_origin=True)
         discordid = int(ctx.author.id)
-        status, response = await apirequest(f"/llm/git/{discordid}", method="POST")
+        # 디퍼된 인터랙션이라 기본 타임아웃(10초)보다 오래 기다릴 수 있음
+        status, response = await apirequest(
+            f"/llm/git/{discordid}", method="POST", timeout=api_llm_timeout
+        )
         if status == 204:
             await ctx.send(_("not_linked_github"), ephemeral=True)
             return
@@ -19,12 +19,14 @@ class Webhook(Extension):
         self.bot = bot
         self.functions = functions
         self.functions.set("notionwebhook", notionWebhook)
+        self.functions.set("notionwebhooks", notionWebhooks)
 
     def drop(self) -> None:
         """
         Drop the extension.
         """
         self.functions.remove("notionwebhook")
+        self.functions.remove("notionwebhooks")
         super().drop()
 
     @webhookBase.subcommand(
@@ -66,19 +68,78 @@ colors = {
 }
 
 
-async def notionWebhook(bot: Client, params: dict) -> None:
+async def notionWebhook(bot: Client, params: dict) -> dict:
     """
     Notion webhook handler.
     """
-    channelid = params["channelid"]
+    return await notionWebhooks(bot, [params])
+
+
+async def notionWebhooks(bot: Client, events: list[dict]) -> dict:
+    """
+    Notion webhook handler for a batch of events.
+    Events of the same channel are sent together, up to 10 embeds per message.
+    :return: {"failed": indexes of the events that couldn't be sent}, the
+             backend retries those (malformed events are skipped, not failed)
+    """
+    channels: dict[int, list[tuple[int, dict]]] = {}
+    for index, params in enumerate(events):
+        channels.setdefault(params["channelid"], []).append((index, params))
+    results = await asyncio.gather(
+        *[
+            sendWebhookEvents(bot, channelid, indexed)
+            for channelid, indexed in channels.items()
+        ],
+        return_exceptions=True,
+    )
+    failed = []
+    for (channelid, indexed), result in zip(channels.items(), results):
+        if isinstance(result, Exception):
+            bot.logger.error(f"Failed to send webhook events to {channelid}: {result}")
+            failed.extend(index for index, _ in indexed)
+        else:
+            failed.extend(result)
+    return {"failed": sorted(failed)}
+
+
+async def sendWebhookEvents(
+    bot: Client, channelid: int, events: list[tuple[int, dict]]
+) -> list[int]:
+    """
+    :param events: (index in the batch, event) of one channel
+    :return: indexes of the events whose message failed to send
+    """
     channel = await bot.fetch_channel(channelid)
-    guildid = int(channel.guild.id)
-    if "verification_token" in params:
-        await channel.send(
-            f"Here is your verification token: ||{params["verification_token"]}||"
-        )
-        return
+    if channel is None:
+        return []  # 삭제된 채널은 다시 보내도 소용없음
     locale = channel.guild.preferred_locale
+    embeds = []
+    failed = []
+    for index, params in events:
+        if "verification_token" in params:
+            token = params["verification_token"]
+            try:
+                await channel.send(f"Here is your verification token: ||{token}||")
+            except Exception as e:
+                bot.logger.error(f"Failed to send the token to {channelid}: {e}")
+                failed.append(index)
+            continue
+        try:
+            embeds.append((index, webhookEmbed(params, locale)))
+        except Exception as e:
+            # 잘못된 이벤트 하나 때문에 나머지 이벤트를 버리지 않도록 건너뜀
+            bot.logger.error(f"Skipped a malformed webhook event for {channelid}: {e}")
+    for i in range(0, len(embeds), 10):
+        chunk = embeds[i:i + 10]  # 디스코드 메시지당 임베드 최대 10개
+        try:
+            await channel.send(embeds=[embed for _, embed in chunk])
+        except Exception as e:
+            bot.logger.error(f"Failed to send webhook events to {channelid}: {e}")
+            failed.extend(index for index, _ in chunk)
+    return failed
+
+
+def webhookEmbed(params: dict, locale: str) -> Embed:
     type_ = getlocale(params["type"], locale)
     embed = Embed(title=type_,
                   color=colors[params["type"]],
@@ -88,7 +149,11 @@ async def notionWebhook(bot: Client, params: dict) -> None:
     if params["pagetitle"] is not None:
         embed.description = params["workspace_name"] + \
             " - " + params["pagetitle"]
-    embed.set_author(name=str(params["author"]), icon_url=params["avatar_url"])
-    if channel is None:
-        return
-    await channel.send(embeds=embed)
+    # 작성자를 조회하지 못한 이벤트는 author가 None이거나 없음
+    author = params.get("author") or "Unknown"
+    embed.set_author(name=author, icon_url=params.get("avatar_url"))
+    count = params.get("count", 1)
+    if count > 1:
+        # 조용한 구간 동안 합쳐진 같은 이벤트의 개수
+        embed.set_footer(text=getlocale("webhook_event_count", locale).format(count))
+    return embed
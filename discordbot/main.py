@@ -10,9 +10,10 @@ from contextlib import asynccontextmanager
 from typing import Callable
 
 import commons
+import orjson
 from commons import MyFunctions, localizator
 from fastapi import BackgroundTasks, FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from interactions import (AutocompleteContext, Client, Intents, OptionType,
                           SlashContext, check, global_autocomplete, listen,
                           slash_command, slash_option)
@@ -86,7 +87,9 @@ async def lifespan(app: FastAPI):
         bot.debug_scope = commons.devserver
         logger.info("Bot starting.in debug mode")
     asyncio.create_task(bot.astart(commons.token))
+    commons.get_api_session()
     yield
+    await commons.close_api_session()
 
 
 app = FastAPI(lifespan=lifespan, root_path=commons.app_root)
@@ -306,6 +309,18 @@ async def autocomplete(ctx: AutocompleteContext):
 functions = MyFunctions(logger)
 
 
+async def cachestats(bot: Client, params: dict) -> dict:
+    """
+    Counters of the bot's caches, for the backend's /stats/caches.
+    """
+    stats = commons.cache_stats()
+    stats["api_singleflight"] = commons.api_singleflight.stats()
+    return stats
+
+
+functions.set("cachestats", cachestats)
+
+
 @app.get("/call/{functionname}")
 async def discordbot(request: Request, functionname: str, params: str = None):
     """
@@ -331,6 +346,24 @@ async def discordbot(request: Request, functionname: str, params: str = None):
     return JSONResponse(result)
 
 
+@app.post("/rpc/{functionname}")
+async def discordbot_rpc(request: Request, functionname: str):
+    """
+    POST version of /call, the params are the orjson encoded request body
+    (an object or an array, e.g. a batch of webhook events)
+    :param functionname: name of the function to call
+    :return: result of the function
+    """
+    if request.headers.get("X-Internal-Request") != "true":
+        return ORJSONResponse({"error": "Unauthorized"}, status_code=401)
+    if not hasattr(functions, functionname):
+        return ORJSONResponse({"error": "Function not found"}, status_code=404)
+    body = await request.body()
+    params = orjson.loads(body) if body else {}
+    result = await functions.run(functionname, bot, params)
+    return ORJSONResponse(result)
+
+
 if __name__ == "__main__":
     import uvicorn
 